@@ -1,70 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+import mmap
 from pathlib import Path
 import os
+from typing import Any, List, Tuple
 
 from dotenv import load_dotenv
 import psycopg
+from psycopg import sql
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except Exception:  # pragma: no cover
+    pa = None  # type: ignore
+    pa_csv = None  # type: ignore
 
-CREATE_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS taxi_trip_data (
-    vendor_id INTEGER,
-    pickup_datetime TIMESTAMP,
-    dropoff_datetime TIMESTAMP,
-    passenger_count INTEGER,
-    trip_distance DOUBLE PRECISION,
-    rate_code INTEGER,
-    store_and_fwd_flag TEXT,
-    payment_type INTEGER,
-    fare_amount DOUBLE PRECISION,
-    extra DOUBLE PRECISION,
-    mta_tax DOUBLE PRECISION,
-    tip_amount DOUBLE PRECISION,
-    tolls_amount DOUBLE PRECISION,
-    imp_surcharge DOUBLE PRECISION,
-    total_amount DOUBLE PRECISION,
-    pickup_location_id INTEGER,
-    dropoff_location_id INTEGER
-);
-"""
-
-
-COPY_SQL = """
-COPY taxi_trip_data (
-    vendor_id,
-    pickup_datetime,
-    dropoff_datetime,
-    passenger_count,
-    trip_distance,
-    rate_code,
-    store_and_fwd_flag,
-    payment_type,
-    fare_amount,
-    extra,
-    mta_tax,
-    tip_amount,
-    tolls_amount,
-    imp_surcharge,
-    total_amount,
-    pickup_location_id,
-    dropoff_location_id
+try:
+    from pgpq import ArrowToPostgresBinaryEncoder
+except Exception:  # pragma: no cover
+    ArrowToPostgresBinaryEncoder = None  # type: ignore
+
+
+# Single source of truth for the table shape: every DDL and COPY statement
+# below is generated from this tuple, so adding a column cannot leave the
+# statements out of sync.
+COLUMNS = (
+    ("vendor_id", "INTEGER"),
+    ("pickup_datetime", "TIMESTAMP"),
+    ("dropoff_datetime", "TIMESTAMP"),
+    ("passenger_count", "INTEGER"),
+    ("trip_distance", "DOUBLE PRECISION"),
+    ("rate_code", "INTEGER"),
+    ("store_and_fwd_flag", "TEXT"),
+    ("payment_type", "INTEGER"),
+    ("fare_amount", "DOUBLE PRECISION"),
+    ("extra", "DOUBLE PRECISION"),
+    ("mta_tax", "DOUBLE PRECISION"),
+    ("tip_amount", "DOUBLE PRECISION"),
+    ("tolls_amount", "DOUBLE PRECISION"),
+    ("imp_surcharge", "DOUBLE PRECISION"),
+    ("total_amount", "DOUBLE PRECISION"),
+    ("pickup_location_id", "INTEGER"),
+    ("dropoff_location_id", "INTEGER"),
+)
+
+COPY_COLUMNS = tuple(name for name, _ in COLUMNS)
+
+# psycopg type names per DDL type, used by the binary COPY writer so psycopg
+# can skip text conversion entirely.
+_PG_BINARY_TYPE_BY_DDL = {
+    "INTEGER": "int4",
+    "TIMESTAMP": "timestamp",
+    "DOUBLE PRECISION": "float8",
+    "TEXT": "text",
+}
+
+COPY_COLUMN_PG_TYPES = tuple(
+    _PG_BINARY_TYPE_BY_DDL[ddl_type] for _, ddl_type in COLUMNS
+)
+
+CREATE_TABLE_SQL = sql.SQL(
+    "CREATE TABLE IF NOT EXISTS taxi_trip_data ({columns})"
+).format(
+    columns=sql.SQL(", ").join(
+        sql.SQL("{} {}").format(sql.Identifier(name), sql.SQL(ddl_type))
+        for name, ddl_type in COLUMNS
+    )
 )
-FROM STDIN WITH (FORMAT CSV, HEADER TRUE);
-"""
+
+
+def _build_copy_sql(options: str) -> sql.Composed:
+    return sql.SQL("COPY taxi_trip_data ({columns}) FROM STDIN WITH ({options})").format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, COPY_COLUMNS)),
+        options=sql.SQL(options),
+    )
+
+
+COPY_SQL = _build_copy_sql("FORMAT CSV, HEADER TRUE")
+
+# Parallel workers stream byte ranges past the header, so their COPY must
+# not skip a leading line.
+COPY_SQL_NO_HEADER = _build_copy_sql("FORMAT CSV, HEADER FALSE")
+
+BINARY_COPY_SQL = _build_copy_sql("FORMAT BINARY")
+
+# 8 MiB Arrow read blocks keep the CSV decoder off the critical path.
+ARROW_CSV_BLOCK_SIZE = 8 * 1024 * 1024
+
+# 8 MiB raw-byte chunks for the text COPY fallback: fewer syscalls, and
+# psycopg forwards the bytes verbatim with no codec work in Python.
+COPY_READ_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Bounds for the auto-tuned COPY buffer: big enough to keep the pipeline
+# full, small enough to stay cache- and RSS-friendly.
+MIN_COPY_BUFFER_SIZE = 4 * 1024 * 1024
+MAX_COPY_BUFFER_SIZE = 64 * 1024 * 1024
+COPY_BUFFER_TARGET_ROWS = 50_000
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 DEFAULT_CSV_PATH = PROJECT_ROOT / "dataset" / "taxi_trip_data.csv"
 
 
+_SUPPORTED_IMPORT_MODES = frozenset({"fail_if_exists", "truncate", "append"})
+
+
 def _get_import_mode() -> str:
     mode = os.getenv("IMPORT_MODE", "fail_if_exists").strip().lower()
-    supported = {"fail_if_exists", "truncate", "append"}
-    if mode not in supported:
+    if mode not in _SUPPORTED_IMPORT_MODES:
         raise ValueError(
-            f"Unsupported IMPORT_MODE={mode!r}. Use one of: {', '.join(sorted(supported))}."
+            f"Unsupported IMPORT_MODE={mode!r}. "
+            f"Use one of: {', '.join(sorted(_SUPPORTED_IMPORT_MODES))}."
         )
     return mode
 
 
+def _get_copy_workers() -> int:
+    raw = os.getenv("COPY_WORKERS", "1").strip().lower()
+    if raw == "auto":
+        return max(os.cpu_count() or 1, 1)
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(
+            f"COPY_WORKERS must be an integer or 'auto', got: {raw!r}"
+        ) from exc
+    if value < 1:
+        raise ValueError(f"COPY_WORKERS must be >= 1, got: {value}")
+    return value
+
+
+def _is_fast_load_enabled() -> bool:
+    raw = os.getenv("FAST_LOAD", "0").strip().lower()
+    return raw in {"1", "true", "yes", "y", "on"}
+
+
 def _get_csv_path() -> Path:
     raw = os.getenv("TAXI_CSV_PATH", "").strip()
     if raw:
@@ -88,11 +157,222 @@ def _get_connect_timeout_seconds() -> int:
     return value
 
 
-def _count_rows(conn: psycopg.Connection) -> int:
+def _arrow_column_types() -> dict:
+    arrow_type_by_ddl = {
+        "INTEGER": pa.int32(),
+        "TIMESTAMP": pa.timestamp("s"),
+        "DOUBLE PRECISION": pa.float64(),
+        "TEXT": pa.string(),
+    }
+    return {name: arrow_type_by_ddl[ddl_type] for name, ddl_type in COLUMNS}
+
+
+def _iter_typed_rows(batch):
+    """Yield typed row tuples from an Arrow record batch.
+
+    All per-value parsing (text to int/float/timestamp) already happened in
+    Arrow's C++ CSV reader; the only Python-level work left per row is the
+    zip over the materialized column lists.
+    """
+    return zip(*(column.to_pylist() for column in batch.columns))
+
+
+def _open_arrow_csv(csv_path: Path):
+    return pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=ARROW_CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(column_types=_arrow_column_types()),
+    )
+
+
+def _copy_csv_binary(cur: psycopg.Cursor, csv_path: Path) -> None:
+    """Stream the CSV through binary COPY with typed rows.
+
+    PyArrow parses the CSV client-side in large blocks, so the PostgreSQL
+    backend receives pre-typed binary tuples and skips text parsing and
+    per-column conversions entirely. When pgpq is installed, whole Arrow
+    record batches are encoded to the binary COPY wire format in native
+    code, bypassing the per-row Python loop as well.
+    """
+    reader = _open_arrow_csv(csv_path)
+    if ArrowToPostgresBinaryEncoder is not None:
+        encoder = ArrowToPostgresBinaryEncoder(reader.schema)
+        with cur.copy(BINARY_COPY_SQL) as copy:
+            copy.write(encoder.write_header())
+            for batch in reader:
+                copy.write(encoder.write_batch(batch))
+            copy.write(encoder.finish())
+        return
+
+    with cur.copy(BINARY_COPY_SQL) as copy:
+        copy.set_types(COPY_COLUMN_PG_TYPES)
+        for batch in reader:
+            for row in _iter_typed_rows(batch):
+                copy.write_row(row)
+
+
+def _copy_csv_text(
+    cur: psycopg.Cursor,
+    csv_path: Path,
+    buffer_size: int = COPY_READ_BUFFER_SIZE,
+) -> None:
+    """Fallback COPY path: stream raw CSV bytes when PyArrow is unavailable.
+
+    The file is memory-mapped and sliced straight onto the COPY wire in
+    newline-aligned chunks, so no per-chunk Python string is allocated and
+    no decode/encode round-trip happens.
+    """
+    with cur.copy(COPY_SQL) as copy:
+        with csv_path.open("rb") as file_obj:
+            try:
+                mapped = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Empty file or mmap unsupported; fall back to buffered reads.
+                _stream_file_buffered(copy, file_obj, buffer_size)
+                return
+
+            with mapped:
+                pos = 0
+                end = len(mapped)
+                while pos < end:
+                    limit = min(pos + buffer_size, end)
+                    if limit < end:
+                        cut = mapped.rfind(b"\n", pos, limit) + 1
+                        if cut <= pos:
+                            # Pathological line longer than the window; send
+                            # the raw window, COPY handles mid-record splits.
+                            cut = limit
+                    else:
+                        cut = end
+                    copy.write(mapped[pos:cut])
+                    pos = cut
+
+
+def _stream_file_buffered(copy: Any, file_obj: Any, buffer_size: int) -> None:
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    while True:
+        read_size = file_obj.readinto(buffer)
+        if not read_size:
+            break
+        copy.write(view[:read_size])
+
+
+def _choose_copy_buffer_size(csv_path: Path) -> int:
+    """Pick a COPY buffer sized to hold roughly 50k rows of this file."""
+    try:
+        with csv_path.open("rb") as file_obj:
+            sample = file_obj.read(1 << 20)
+    except OSError:
+        return COPY_READ_BUFFER_SIZE
+    newline_count = sample.count(b"\n")
+    if not newline_count:
+        return COPY_READ_BUFFER_SIZE
+    avg_row_bytes = len(sample) / newline_count
+    target = int(avg_row_bytes * COPY_BUFFER_TARGET_ROWS)
+    return max(MIN_COPY_BUFFER_SIZE, min(MAX_COPY_BUFFER_SIZE, target))
+
+
+def _compute_chunk_offsets(csv_path: Path, workers: int) -> List[Tuple[int, int]]:
+    """Split the file into newline-aligned byte ranges, one per worker."""
+    file_size = csv_path.stat().st_size
+    if file_size == 0:
+        return []
+
+    approx_chunk = max(file_size // workers, 1)
+    boundaries = [0]
+    with csv_path.open("rb") as file_obj:
+        for index in range(1, workers):
+            target = index * approx_chunk
+            if target <= boundaries[-1]:
+                continue
+            file_obj.seek(target)
+            file_obj.readline()
+            boundary = file_obj.tell()
+            if boundary >= file_size:
+                break
+            boundaries.append(boundary)
+    boundaries.append(file_size)
+    return [
+        (boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)
+    ]
+
+
+def _copy_byte_range(
+    dsn: str,
+    csv_path: Path,
+    start: int,
+    end: int,
+    *,
+    include_header: bool,
+    connect_timeout_seconds: int,
+    fast_load: bool,
+    buffer_size: int = COPY_READ_BUFFER_SIZE,
+) -> None:
+    copy_sql = COPY_SQL if include_header else COPY_SQL_NO_HEADER
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with psycopg.connect(dsn, connect_timeout=connect_timeout_seconds) as conn:
+        with conn.cursor() as cur:
+            if fast_load:
+                cur.execute("SET LOCAL synchronous_commit = off")
+            with cur.copy(copy_sql) as copy:
+                with csv_path.open("rb") as file_obj:
+                    file_obj.seek(start)
+                    remaining = end - start
+                    while remaining > 0:
+                        to_read = min(buffer_size, remaining)
+                        read_size = file_obj.readinto(view[:to_read])
+                        if not read_size:
+                            break
+                        copy.write(view[:read_size])
+                        remaining -= read_size
+        conn.commit()
+
+
+def _copy_csv_parallel(
+    dsn: str,
+    csv_path: Path,
+    workers: int,
+    *,
+    connect_timeout_seconds: int,
+    fast_load: bool,
+    buffer_size: int = COPY_READ_BUFFER_SIZE,
+) -> None:
+    """Run N concurrent COPY streams, each feeding one byte range.
+
+    PostgreSQL accepts concurrent COPY into the same table, so both
+    client-side I/O and server-side CSV parsing scale with the worker count.
+    """
+    ranges = _compute_chunk_offsets(csv_path, workers)
+    if not ranges:
+        return
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(
+                _copy_byte_range,
+                dsn,
+                csv_path,
+                start,
+                end,
+                include_header=(index == 0),
+                connect_timeout_seconds=connect_timeout_seconds,
+                fast_load=fast_load,
+                buffer_size=buffer_size,
+            )
+            for index, (start, end) in enumerate(ranges)
+        ]
+        for future in futures:
+            future.result()
+
+
+def _has_rows(conn: psycopg.Connection) -> bool:
+    # EXISTS stops at the first row instead of scanning the whole heap
+    # the way COUNT(*) would on a loaded table.
     with conn.cursor() as cur:
-        cur.execute("SELECT COUNT(*) FROM taxi_trip_data")
+        cur.execute("SELECT EXISTS (SELECT 1 FROM taxi_trip_data)")
         value = cur.fetchone()
-    return int(value[0] if value else 0)
+    return bool(value[0]) if value else False
 
 
 def main() -> None:
@@ -111,14 +391,21 @@ def main() -> None:
         postgres_dsn,
         connect_timeout=connect_timeout_seconds,
     ) as conn:
+        # DDL and metadata probes run autocommit: no implicit BEGIN/COMMIT
+        # round-trips. Only the COPY itself gets an explicit transaction.
+        conn.autocommit = True
         with conn.cursor() as cur:
             cur.execute(CREATE_TABLE_SQL)
-            conn.commit()
 
-        existing_rows = _count_rows(conn)
-        print(f"Current rows in taxi_trip_data: {existing_rows}")
+        if import_mode == "append":
+            # Appending never needs the precheck; assume data may exist.
+            has_existing_rows = True
+            print("IMPORT_MODE=append: skipping existing-data precheck.")
+        else:
+            has_existing_rows = _has_rows(conn)
+            print(f"taxi_trip_data already has data: {has_existing_rows}")
 
-        if existing_rows > 0 and import_mode == "fail_if_exists":
+        if has_existing_rows and import_mode == "fail_if_exists":
             raise RuntimeError(
                 "Table taxi_trip_data already has data. "
                 "Set IMPORT_MODE=truncate to reload from scratch or IMPORT_MODE=append to add more rows."
@@ -128,18 +415,48 @@ def main() -> None:
             print("Truncating existing data before import...")
             with conn.cursor() as cur:
                 cur.execute("TRUNCATE TABLE taxi_trip_data")
-                conn.commit()
+
+        fast_load = _is_fast_load_enabled()
+        # Dropping WAL logging is only safe when the table holds no data we
+        # could lose, i.e. on a fresh or just-truncated load.
+        use_unlogged = fast_load and (
+            import_mode == "truncate" or not has_existing_rows
+        )
+        if use_unlogged:
+            print("FAST_LOAD: switching taxi_trip_data to UNLOGGED for the bulk load...")
+            with conn.cursor() as cur:
+                cur.execute("ALTER TABLE taxi_trip_data SET UNLOGGED")
 
         print("Copying CSV into taxi_trip_data table (this can take a while)...")
-        with conn.cursor() as cur:
-            with cur.copy(COPY_SQL) as copy:
-                with csv_path.open("r", encoding="utf-8") as file_obj:
-                    while True:
-                        chunk = file_obj.read(1024 * 1024)
-                        if not chunk:
-                            break
-                        copy.write(chunk)
-            conn.commit()
+        copy_workers = _get_copy_workers()
+        copy_buffer_size = _choose_copy_buffer_size(csv_path)
+        print(f"COPY buffer size: {copy_buffer_size // (1024 * 1024)} MiB")
+        if copy_workers > 1:
+            print(f"Streaming with {copy_workers} parallel COPY workers...")
+            _copy_csv_parallel(
+                postgres_dsn,
+                csv_path,
+                copy_workers,
+                connect_timeout_seconds=connect_timeout_seconds,
+                fast_load=fast_load,
+                buffer_size=copy_buffer_size,
+            )
+        else:
+            with conn.transaction():
+                with conn.cursor() as cur:
+                    if fast_load:
+                        cur.execute("SET LOCAL synchronous_commit = off")
+                        cur.execute("SET LOCAL maintenance_work_mem = '1GB'")
+                        cur.execute("SET LOCAL work_mem = '256MB'")
+                    if pa_csv is not None:
+                        _copy_csv_binary(cur, csv_path)
+                    else:
+                        _copy_csv_text(cur, csv_path, buffer_size=copy_buffer_size)
+
+        if use_unlogged:
+            print("FAST_LOAD: restoring taxi_trip_data to LOGGED...")
+            with conn.cursor() as cur:
+                cur.execute("ALTER TABLE taxi_trip_data SET LOGGED")
 
     print(f"Done loading data into PostgreSQL (mode={import_mode}).")
 
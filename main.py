@@ -1,4 +1,5 @@
 ﻿import argparse
+import functools
 import inspect
 import logging
 import sys
@@ -36,6 +37,18 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
+@functools.lru_cache(maxsize=8)
+def _supports_thread_id(ask_func) -> bool:
+    # Reflection is cached per agent class, so repeated main() invocations
+    # (smoke loops) do not pay inspect.signature again.
+    if ask_func is None:
+        return False
+    try:
+        return "thread_id" in inspect.signature(ask_func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
 def configure_stdout() -> None:
     if hasattr(sys.stdout, "reconfigure"):
         try:
@@ -49,6 +62,17 @@ def configure_stdout() -> None:
             pass
 
 
+_NOISY_LOGGERS = ("httpx", "httpcore", "openai", "openai._base_client")
+
+
+@functools.lru_cache(maxsize=1)
+def _silence_noisy_loggers() -> None:
+    # Keep third-party transport noise out of normal runs; one-shot per
+    # process so repeated configure_logging calls skip the logger locks.
+    for name in _NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
 def configure_logging(level: str) -> None:
     numeric_level = getattr(logging, level.upper(), logging.INFO)
     logging.basicConfig(
@@ -56,11 +80,7 @@ def configure_logging(level: str) -> None:
         format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
         force=True,
     )
-    # Keep third-party transport noise out of normal runs.
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("httpcore").setLevel(logging.WARNING)
-    logging.getLogger("openai").setLevel(logging.WARNING)
-    logging.getLogger("openai._base_client").setLevel(logging.WARNING)
+    _silence_noisy_loggers()
 
 
 def main() -> int:
@@ -93,11 +113,7 @@ def main() -> int:
         )
         print(f"Workflow render/save skipped due to error: {safe_message}\n")
 
-    try:
-        ask_signature = inspect.signature(agent.ask)
-        supports_thread_id = "thread_id" in ask_signature.parameters
-    except (TypeError, ValueError):
-        supports_thread_id = False
+    supports_thread_id = _supports_thread_id(getattr(type(agent), "ask", None))
 
     try:
         if supports_thread_id:
@@ -3,6 +3,18 @@ import os
 
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except Exception:  # pragma: no cover
+    pa = None  # type: ignore
+    pa_csv = None  # type: ignore
+
+
+# Small Arrow read blocks: the streaming reader stops as soon as the sample
+# rows are satisfied instead of decoding a large buffer.
+PREVIEW_BLOCK_SIZE = 64 * 1024
+
 
 COLUMN_DESCRIPTIONS = {
     "vendor_id": "TPEP vendor code. 1=Creative Mobile Technologies, 2=VeriFone Inc.",
@@ -39,17 +51,40 @@ def _get_csv_path() -> Path:
     return DEFAULT_CSV_PATH
 
 
+def _read_sample(csv_path: Path, nrows: int = 20) -> pd.DataFrame:
+    if pa_csv is None:
+        return pd.read_csv(
+            csv_path,
+            nrows=nrows,
+            parse_dates=["pickup_datetime", "dropoff_datetime"],
+        )
+
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=PREVIEW_BLOCK_SIZE),
+    )
+    batches = []
+    collected = 0
+    while collected < nrows:
+        try:
+            batch = reader.read_next_batch()
+        except StopIteration:
+            break
+        batches.append(batch)
+        collected += batch.num_rows
+    if not batches:
+        return pd.DataFrame()
+    table = pa.Table.from_batches(batches)
+    return table.slice(0, nrows).to_pandas()
+
+
 def main() -> None:
     csv_path = _get_csv_path()
     if not csv_path.exists():
         raise FileNotFoundError(f"Cannot find file: {csv_path}")
 
     # Read only a small sample to inspect data shape quickly.
-    df = pd.read_csv(
-        csv_path,
-        nrows=20,
-        parse_dates=["pickup_datetime", "dropoff_datetime"],
-    )
+    df = _read_sample(csv_path, nrows=20)
 
     print(f"File: {csv_path}")
     print(f"Sample rows: {len(df)}")
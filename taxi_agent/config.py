@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import functools
 import os
 import re
 from typing import Optional
@@ -6,6 +7,12 @@ from typing import Optional
 
 SCHEMA_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
+_TRUE_VALUES = frozenset({"1", "true", "yes", "y", "on"})
+_FALSE_VALUES = frozenset({"0", "false", "no", "n", "off"})
+_ALLOWED_LOG_LEVELS = frozenset(
+    {"CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"}
+)
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -31,6 +38,7 @@ class Settings:
     log_level: str
     db_connect_timeout_seconds: int = 10
     memory_max_threads: int = 200
+    memory_ttl_seconds: int = 3600
 
 
 def _get_int_env(name: str, default: int, min_value: int = 1) -> int:
@@ -47,9 +55,9 @@ def _get_int_env(name: str, default: int, min_value: int = 1) -> int:
 
 def _get_bool_env(name: str, default: bool) -> bool:
     raw = os.getenv(name, str(default)).strip().lower()
-    if raw in {"1", "true", "yes", "y", "on"}:
+    if raw in _TRUE_VALUES:
         return True
-    if raw in {"0", "false", "no", "n", "off"}:
+    if raw in _FALSE_VALUES:
         return False
     raise ValueError(
         f"{name} must be a boolean value "
@@ -59,9 +67,8 @@ def _get_bool_env(name: str, default: bool) -> bool:
 
 
 def _get_log_level_env(name: str, default: str = "INFO") -> str:
-    allowed_levels = {"CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"}
     raw = (os.getenv(name, default) or default).strip().upper()
-    if raw in allowed_levels:
+    if raw in _ALLOWED_LOG_LEVELS:
         return raw
     return default
 
@@ -76,7 +83,13 @@ def _validate_db_schema(value: str) -> str:
     return schema
 
 
+@functools.lru_cache(maxsize=1)
 def load_settings() -> Settings:
+    """Load settings from the environment once per process.
+
+    The result is memoized; call ``load_settings.cache_clear()`` after
+    changing environment variables (tests do this automatically).
+    """
     openrouter_api_key = (os.getenv("OPENROUTER_API_KEY") or "").strip()
     if not openrouter_api_key:
         raise ValueError(
@@ -140,6 +153,7 @@ def load_settings() -> Settings:
     log_level = _get_log_level_env("LOG_LEVEL", "INFO")
     db_connect_timeout_seconds = _get_int_env("DB_CONNECT_TIMEOUT_SECONDS", 10)
     memory_max_threads = _get_int_env("MEMORY_MAX_THREADS", 200)
+    memory_ttl_seconds = _get_int_env("MEMORY_TTL_SECONDS", 3600)
 
     return Settings(
         postgres_dsn=postgres_dsn,
@@ -164,4 +178,5 @@ def load_settings() -> Settings:
         log_level=log_level,
         db_connect_timeout_seconds=db_connect_timeout_seconds,
         memory_max_threads=memory_max_threads,
+        memory_ttl_seconds=memory_ttl_seconds,
     )
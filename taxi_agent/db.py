@@ -1,11 +1,19 @@
+import atexit
+from contextlib import contextmanager
 import logging
 import threading
-from typing import Any, Dict, List, Tuple
+from time import monotonic
+from typing import Any, Dict, Iterator, List, Tuple
 
 import psycopg
 from langchain_community.utilities import SQLDatabase
 from psycopg.rows import dict_row
 
+try:
+    from psycopg_pool import ConnectionPool
+except Exception:  # pragma: no cover
+    ConnectionPool = None  # type: ignore
+
 from .redaction import redact_sensitive_text
 from .schema import ColumnSchema, TableSchema
 from .sql_guard import normalize_sql, validate_readonly_sql
@@ -19,6 +27,9 @@ class PostgresClient:
         query_timeout_ms: int = 30000,
         default_schema: str = "public",
         connect_timeout_seconds: int = 10,
+        pool_min_size: int = 2,
+        pool_max_size: int = 10,
+        schema_cache_ttl_seconds: int = 0,
         logger: logging.Logger | None = None,
     ):
         self.dsn = dsn
@@ -26,9 +37,55 @@ class PostgresClient:
         self.query_timeout_ms = query_timeout_ms
         self.default_schema = default_schema
         self.connect_timeout_seconds = connect_timeout_seconds
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
         self.logger = logger or logging.getLogger(__name__)
         self._sql_db_by_schema: Dict[str, SQLDatabase] = {}
         self._sql_db_lock = threading.Lock()
+        self._pool: Any = None
+        self._pool_lock = threading.Lock()
+        self.schema_cache_ttl_seconds = schema_cache_ttl_seconds
+        self._schema_cache: Dict[str, Tuple[float, List[TableSchema]]] = {}
+        self._schema_cache_lock = threading.Lock()
+
+    def _get_pool(self) -> Any:
+        if ConnectionPool is None:
+            return None
+        if self._pool is not None:
+            return self._pool
+
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ConnectionPool(
+                    self.dsn,
+                    min_size=self.pool_min_size,
+                    max_size=self.pool_max_size,
+                    timeout=self.connect_timeout_seconds,
+                    kwargs={"connect_timeout": self.connect_timeout_seconds},
+                )
+                atexit.register(self.close)
+            return self._pool
+
+    @contextmanager
+    def _borrow_connection(self) -> Iterator[psycopg.Connection]:
+        pool = self._get_pool()
+        if pool is not None:
+            with pool.connection() as conn:
+                yield conn
+            return
+
+        # Fallback without psycopg_pool: one short-lived connection per call.
+        with psycopg.connect(
+            self.dsn,
+            connect_timeout=self.connect_timeout_seconds,
+        ) as conn:
+            yield conn
+
+    def close(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
 
     def _get_sql_database(self, table_schema: str) -> SQLDatabase:
         cached = self._sql_db_by_schema.get(table_schema)
@@ -54,35 +111,32 @@ class PostgresClient:
             return sql_db
 
     def run_query(self, sql: str) -> List[Dict[str, Any]]:
-        with psycopg.connect(
-            self.dsn,
-            connect_timeout=self.connect_timeout_seconds,
-        ) as conn:
+        with self._borrow_connection() as conn:
             with conn.cursor(row_factory=dict_row) as cur:
-                # Defense-in-depth: even if SQL guard misses something,
-                # this transaction is forced read-only.
-                cur.execute("SET TRANSACTION READ ONLY")
-                # Pin search_path to the configured analytics schema to avoid
-                # accidentally reading same-named tables from another schema.
-                cur.execute(
-                    "SELECT set_config('search_path', %s, true)",
-                    (self.default_schema,),
-                )
-                # Apply timeout only for this transaction.
-                cur.execute(
-                    "SELECT set_config('statement_timeout', %s, true)",
-                    (str(self.query_timeout_ms),),
-                )
-                cur.execute(sql)
+                # Send the session setup and the query in one pipeline flush
+                # instead of four separate client<->server round-trips.
+                with conn.pipeline():
+                    # Defense-in-depth: even if SQL guard misses something,
+                    # this transaction is forced read-only.
+                    cur.execute("SET TRANSACTION READ ONLY")
+                    # Pin search_path to the configured analytics schema to avoid
+                    # accidentally reading same-named tables from another schema.
+                    cur.execute(
+                        "SELECT set_config('search_path', %s, true)",
+                        (self.default_schema,),
+                    )
+                    # Apply timeout only for this transaction.
+                    cur.execute(
+                        "SELECT set_config('statement_timeout', %s, true)",
+                        (str(self.query_timeout_ms),),
+                    )
+                    cur.execute(sql)
                 rows = cur.fetchmany(self.row_limit)
                 return list(rows)
 
     def check_connection(self) -> Tuple[bool, str]:
         try:
-            with psycopg.connect(
-                self.dsn,
-                connect_timeout=self.connect_timeout_seconds,
-            ) as conn:
+            with self._borrow_connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute("SELECT 1")
                     cur.fetchone()
@@ -91,51 +145,56 @@ class PostgresClient:
             return False, redact_sensitive_text(str(exc))
 
     def get_table_schemas(self, table_schema: str = "public") -> List[TableSchema]:
+        ttl = self.schema_cache_ttl_seconds
+        if ttl > 0:
+            with self._schema_cache_lock:
+                cached = self._schema_cache.get(table_schema)
+                if cached is not None and monotonic() - cached[0] < ttl:
+                    return list(cached[1])
+
+        # Aggregate columns server-side: one row per table instead of one
+        # per column, so both wire traffic and Python grouping shrink.
         query = """
             SELECT
                 table_schema,
                 table_name,
-                column_name,
-                data_type,
-                ordinal_position
+                jsonb_agg(
+                    jsonb_build_object(
+                        'column_name', column_name,
+                        'data_type', data_type,
+                        'ordinal_position', ordinal_position
+                    )
+                    ORDER BY ordinal_position
+                ) AS columns
             FROM information_schema.columns
             WHERE table_schema = %s
-            ORDER BY table_name, ordinal_position
+            GROUP BY table_schema, table_name
+            ORDER BY table_schema, table_name
         """
-        with psycopg.connect(
-            self.dsn,
-            connect_timeout=self.connect_timeout_seconds,
-        ) as conn:
+        with self._borrow_connection() as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(query, (table_schema,))
                 rows = cur.fetchall()
 
-        grouped: Dict[str, Dict[str, Any]] = {}
-        for row in rows:
-            key = f"{row['table_schema']}.{row['table_name']}"
-            if key not in grouped:
-                grouped[key] = {
-                    "table_schema": row["table_schema"],
-                    "table_name": row["table_name"],
-                    "columns": [],
-                }
-            grouped[key]["columns"].append(
-                ColumnSchema(
-                    column_name=row["column_name"],
-                    data_type=row["data_type"],
-                    ordinal_position=int(row["ordinal_position"]),
-                )
-            )
-
         tables = [
             TableSchema(
-                table_schema=item["table_schema"],
-                table_name=item["table_name"],
-                columns=item["columns"],
+                table_schema=row["table_schema"],
+                table_name=row["table_name"],
+                columns=[
+                    ColumnSchema(
+                        column_name=column["column_name"],
+                        data_type=column["data_type"],
+                        ordinal_position=int(column["ordinal_position"]),
+                    )
+                    for column in row["columns"]
+                ],
             )
-            for item in grouped.values()
+            for row in rows
         ]
-        tables.sort(key=lambda t: (t.table_schema, t.table_name))
+
+        if ttl > 0:
+            with self._schema_cache_lock:
+                self._schema_cache[table_schema] = (monotonic(), list(tables))
         return tables
 
     def get_table_info(
@@ -1,21 +1,36 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import hashlib
 import json
 import logging
 from pathlib import Path
 import re
 import threading
-from typing import Any, Dict, Literal, Optional, cast
+from typing import Any, Dict, Iterator, Literal, Optional, Tuple, cast
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:
+    from cachetools import TTLCache
+except Exception:  # pragma: no cover
+    TTLCache = None  # type: ignore
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langgraph.graph import END, START, StateGraph
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from .config import Settings
 from .db import PostgresClient
 from .prompts import (
     ANSWER_SYSTEM_PROMPT,
     INTENT_SYSTEM_PROMPT,
+    ROUTE_INTENT_SYSTEM_PROMPT,
     ROUTER_SYSTEM_PROMPT,
 )
 from .redaction import redact_sensitive_text
@@ -36,6 +51,10 @@ from .types import AgentResult, DashboardState
 
 
 class RouteDecision(BaseModel):
+    # Frozen: instances are tiny immutable value objects that are cached
+    # and shared across threads.
+    model_config = ConfigDict(frozen=True)
+
     route: Literal["sql", "unsupported"] = Field(
         ..., description="Route name: sql or unsupported"
     )
@@ -43,11 +62,15 @@ class RouteDecision(BaseModel):
 
 
 class SQLDraft(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     sql: str = Field(..., description="A single valid PostgreSQL SELECT query")
     reasoning: str = Field("", description="Short explanation")
 
 
 class IntentDecision(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     intent: Literal["sql_query", "sql_followup", "unsupported"] = Field(
         ...,
         description="Task intent classification.",
@@ -55,12 +78,98 @@ class IntentDecision(BaseModel):
     reason: str = Field("", description="Short reason for selected intent")
 
 
+class CombinedDecision(BaseModel):
+    """Route + intent in one structured-output call (one round trip)."""
+
+    model_config = ConfigDict(frozen=True)
+
+    route: Literal["sql", "unsupported"] = Field(
+        ..., description="Route name: sql or unsupported"
+    )
+    route_reason: str = Field("", description="Short reason for route")
+    intent: Literal["sql_query", "sql_followup", "unsupported"] = Field(
+        ...,
+        description="Task intent classification.",
+    )
+    intent_reason: str = Field("", description="Short reason for selected intent")
+
+
+# Prompt templates split once at their placeholders; per-request assembly is
+# then plain concatenation instead of re-parsing the format string.
+_ROUTER_PROMPT_HEAD, _ROUTER_PROMPT_TAIL = ROUTER_SYSTEM_PROMPT.split(
+    "{schema_overview}"
+)
+_INTENT_PROMPT_HEAD, _intent_rest = INTENT_SYSTEM_PROMPT.split("{question}")
+_INTENT_PROMPT_MID, _INTENT_PROMPT_TAIL = _intent_rest.split("{previous_context}")
+_COMBINED_PROMPT_HEAD, _combined_rest = ROUTE_INTENT_SYSTEM_PROMPT.split(
+    "{schema_overview}"
+)
+_COMBINED_PROMPT_MID1, _combined_rest = _combined_rest.split("{question}")
+_COMBINED_PROMPT_MID2, _COMBINED_PROMPT_TAIL = _combined_rest.split(
+    "{previous_context}"
+)
+del _intent_rest, _combined_rest
+
+
 def _stringify_content(content: Any) -> str:
     if isinstance(content, str):
         return content
     return str(content)
 
 
+@functools.lru_cache(maxsize=8)
+def _router_system_message(schema_overview: str) -> SystemMessage:
+    # The schema overview rarely changes within a session, so the large
+    # router system message is built once and shared across calls; the
+    # stable prefix also helps providers that cache prompt prefixes.
+    return SystemMessage(
+        content=_ROUTER_PROMPT_HEAD + schema_overview + _ROUTER_PROMPT_TAIL
+    )
+
+
+# The answer system prompt is fully static; share one immutable message
+# instead of allocating it per call. Router messages are cached per schema
+# overview above; intent prompts embed the question and cannot be interned.
+_ANSWER_SYSTEM_MSG = SystemMessage(content=ANSWER_SYSTEM_PROMPT)
+
+_ANSWER_ROWS_MAX = 20
+_ANSWER_ROWS_MAX_BYTES = 8_000
+
+
+def _pack_rows_to_budget(
+    rows: Any,
+    *,
+    max_rows: int = _ANSWER_ROWS_MAX,
+    max_bytes: int = _ANSWER_ROWS_MAX_BYTES,
+) -> str:
+    """Serialize a row preview as a JSON array capped by serialized size.
+
+    A row-count cap alone lets one wide row blow past the LLM context
+    budget, so rows are encoded one by one until ``max_bytes`` is reached.
+    When anything is dropped, a marker object records the true row count.
+    """
+    pieces = []
+    used = 0
+    for row in rows[:max_rows]:
+        encoded = _dumps_rows(row)
+        if pieces and used + len(encoded) > max_bytes:
+            break
+        pieces.append(encoded)
+        used += len(encoded) + 1
+    if len(pieces) < len(rows):
+        pieces.append(_dumps_rows({"_truncated": True, "total_rows": len(rows)}))
+    return "[" + ",".join(pieces) + "]"
+
+
+def _dumps_rows(rows: Any) -> str:
+    # orjson serializes date/datetime natively and is several times faster
+    # than the stdlib encoder on wide Postgres rows; Decimal still goes
+    # through default=str in both branches.
+    if orjson is not None:
+        return orjson.dumps(rows, default=str).decode("utf-8")
+    return json.dumps(rows, default=str)
+
+
 class TaxiDashboardAgent:
     NON_REPAIRABLE_ERROR_TYPES = {"provider", "connection", "schema_context"}
     MAX_THREAD_ID_LENGTH = 128
@@ -88,6 +197,7 @@ class TaxiDashboardAgent:
             query_timeout_ms=settings.query_timeout_ms,
             default_schema=settings.db_schema,
             connect_timeout_seconds=settings.db_connect_timeout_seconds,
+            schema_cache_ttl_seconds=settings.schema_cache_ttl_seconds,
             logger=self.db_logger,
         )
 
@@ -105,6 +215,15 @@ class TaxiDashboardAgent:
         self.router_llm = self.llm.with_structured_output(RouteDecision)
         self.intent_llm = self.llm.with_structured_output(IntentDecision)
         self.sql_llm = self.llm.with_structured_output(SQLDraft)
+        # One fused route+intent call saves a sequential LLM round trip on
+        # the happy path. Injected models that only understand the legacy
+        # schemas keep the two separate calls.
+        try:
+            self.combined_llm: Optional[Any] = self.llm.with_structured_output(
+                CombinedDecision
+            )
+        except Exception:
+            self.combined_llm = None
         self.route_output_parser = PydanticOutputParser(pydantic_object=RouteDecision)
         self.intent_output_parser = PydanticOutputParser(
             pydantic_object=IntentDecision
@@ -129,14 +248,58 @@ class TaxiDashboardAgent:
             raw_llm=self.llm,
         )
         self.metadata_service = MetadataContextService(max_chars=3000)
-        self._conversation_memory: Dict[str, Dict[str, str]] = {}
         self._max_memory_threads = settings.memory_max_threads
+        # TTL-bounded memory drops stale threads automatically, capping
+        # worst-case RSS without an explicit sweeper.
+        if TTLCache is not None:
+            self._conversation_memory: Any = TTLCache(
+                maxsize=self._max_memory_threads,
+                ttl=settings.memory_ttl_seconds,
+            )
+        else:
+            self._conversation_memory = OrderedDict()
         self._memory_question_max_chars = 500
         self._memory_sql_max_chars = 2000
         self._memory_answer_max_chars = 1200
         self._memory_lock = threading.Lock()
 
-        self.graph = self._build_graph()
+        # Router/intent decisions are deterministic for identical inputs
+        # (temperature=0), so repeated questions can skip the LLM round trip.
+        self._decision_cache_max_entries = 1024
+        self._route_decision_cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._intent_decision_cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._combined_decision_cache: "OrderedDict[str, Tuple[str, ...]]" = (
+            OrderedDict()
+        )
+        self._decision_cache_lock = threading.Lock()
+
+        # On the legacy two-call path the intent prompt does not depend on
+        # the routing result, so the intent call is prefetched in a worker
+        # thread while the router round trip is in flight.
+        self._intent_executor: Optional[ThreadPoolExecutor] = None
+        self._intent_executor_lock = threading.Lock()
+        self._pending_intent: Dict[str, "Future[Any]"] = {}
+        self._pending_intent_lock = threading.Lock()
+
+        # Compiled lazily on first use; constructing an agent stays cheap
+        # for hosts that build instances speculatively.
+        self._graph: Optional[Any] = None
+        self._graph_lock = threading.Lock()
+
+    @property
+    def graph(self) -> Any:
+        graph = self._graph
+        if graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = self._build_graph()
+                graph = self._graph
+        return graph
+
+    @graph.setter
+    def graph(self, value: Any) -> None:
+        # Tests and embedders may swap in a stand-in runner.
+        self._graph = value
 
     @staticmethod
     def _normalize_thread_id(thread_id: str) -> str:
@@ -145,14 +308,48 @@ class TaxiDashboardAgent:
             normalized = normalized[: TaxiDashboardAgent.MAX_THREAD_ID_LENGTH]
         return normalized or "default"
 
+    @staticmethod
+    def _decision_cache_key(*parts: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode("utf-8", "replace"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _get_cached_decision(
+        self,
+        cache: "OrderedDict[str, Tuple[str, ...]]",
+        key: str,
+    ) -> Optional[Tuple[str, ...]]:
+        with self._decision_cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _store_cached_decision(
+        self,
+        cache: "OrderedDict[str, Tuple[str, ...]]",
+        key: str,
+        value: Tuple[str, ...],
+    ) -> None:
+        with self._decision_cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self._decision_cache_max_entries:
+                cache.popitem(last=False)
+
     @staticmethod
     def _truncate_prompt_piece(value: str, max_chars: int = 1200) -> str:
+        # Hot path: inputs almost always fit the budget, and str.strip()
+        # returns the original object when there is nothing to strip, so
+        # the common case is one length check with no allocation.
         text = value.strip()
         if len(text) <= max_chars:
             return text
-        if max_chars <= 3:
-            return text[:max_chars]
-        return text[: max_chars - 3].rstrip() + "..."
+        if max_chars > 3:
+            return text[: max_chars - 3].rstrip() + "..."
+        return text[:max_chars]  # degenerate budgets; kept for safety
 
     def _remember_success_turn(
         self,
@@ -162,28 +359,30 @@ class TaxiDashboardAgent:
         sql_query: str,
         final_answer: str,
     ) -> None:
+        # Truncate outside the lock; only the O(1) LRU bookkeeping needs it.
+        turn = {
+            "question": self._truncate_prompt_piece(
+                question,
+                max_chars=self._memory_question_max_chars,
+            ),
+            "sql_query": self._truncate_prompt_piece(
+                sql_query,
+                max_chars=self._memory_sql_max_chars,
+            ),
+            "final_answer": self._truncate_prompt_piece(
+                final_answer,
+                max_chars=self._memory_answer_max_chars,
+            ),
+        }
         with self._memory_lock:
-            if thread_id in self._conversation_memory:
-                # Move existing thread to the end (most recent).
-                self._conversation_memory.pop(thread_id, None)
-            elif len(self._conversation_memory) >= self._max_memory_threads:
-                oldest_thread_id = next(iter(self._conversation_memory))
-                self._conversation_memory.pop(oldest_thread_id, None)
-
-            self._conversation_memory[thread_id] = {
-                "question": self._truncate_prompt_piece(
-                    question,
-                    max_chars=self._memory_question_max_chars,
-                ),
-                "sql_query": self._truncate_prompt_piece(
-                    sql_query,
-                    max_chars=self._memory_sql_max_chars,
-                ),
-                "final_answer": self._truncate_prompt_piece(
-                    final_answer,
-                    max_chars=self._memory_answer_max_chars,
-                ),
-            }
+            memory = self._conversation_memory
+            if isinstance(memory, OrderedDict):
+                # Fallback LRU without cachetools: explicit O(1) bookkeeping.
+                if thread_id in memory:
+                    memory.move_to_end(thread_id)
+                elif len(memory) >= self._max_memory_threads:
+                    memory.popitem(last=False)
+            memory[thread_id] = turn
 
     def _build_openrouter_headers(self, settings: Settings) -> Optional[Dict[str, str]]:
         default_headers: Dict[str, str] = {}
@@ -245,15 +444,43 @@ class TaxiDashboardAgent:
 
         question = state["question"]
         schema_overview = state.get("schema_overview", "No schema overview available.")
-        route_prompt = ROUTER_SYSTEM_PROMPT.format(schema_overview=schema_overview)
+        if self.combined_llm is not None:
+            combined = self._route_and_intent_combined(
+                state,
+                question=question,
+                schema_overview=schema_overview,
+            )
+            if combined is not None:
+                return combined
+
+        # Keyed on the schema overview too, so schema refreshes invalidate
+        # stale routing decisions naturally.
+        cache_key = self._decision_cache_key(schema_overview, question)
+        cached = self._get_cached_decision(self._route_decision_cache, cache_key)
+        if cached is not None:
+            cached_route, cached_reason = cached
+            self.logger.debug("Route decision cache hit route=%s", cached_route)
+            return {
+                "route": cached_route,
+                "route_reason": cached_reason,
+                "attempts": state.get("attempts", 0),
+            }
+
+        self._speculate_intent(state, question)
+        route_message = _router_system_message(schema_overview)
         try:
             decision = self.router_llm.invoke(
                 [
-                    SystemMessage(content=route_prompt),
+                    route_message,
                     HumanMessage(content=question),
                 ]
             )
             self.logger.info("Route decision=%s", decision.route)
+            self._store_cached_decision(
+                self._route_decision_cache,
+                cache_key,
+                (decision.route, decision.reason),
+            )
             return {
                 "route": decision.route,
                 "route_reason": decision.reason,
@@ -272,7 +499,7 @@ class TaxiDashboardAgent:
 
             parsed = self._invoke_parser_fallback(
                 parser=self.route_output_parser,
-                system_prompt=route_prompt,
+                system_prompt=_stringify_content(route_message.content),
                 user_input=question,
                 parser_name="Router",
             )
@@ -295,6 +522,75 @@ class TaxiDashboardAgent:
                 "attempts": state.get("attempts", 0),
             }
 
+    def _route_and_intent_combined(
+        self,
+        state: DashboardState,
+        *,
+        question: str,
+        schema_overview: str,
+    ) -> Optional[DashboardState]:
+        previous_context = self._build_previous_context_text(state)
+        cache_key = self._decision_cache_key(
+            schema_overview,
+            question,
+            previous_context,
+        )
+        cached = self._get_cached_decision(self._combined_decision_cache, cache_key)
+        if cached is not None:
+            route, route_reason, intent, intent_reason = cached
+            self.logger.debug("Combined decision cache hit route=%s", route)
+            return {
+                "route": route,
+                "route_reason": route_reason,
+                "intent": intent,
+                "intent_reason": intent_reason,
+                "attempts": state.get("attempts", 0),
+            }
+
+        prompt = "".join(
+            (
+                _COMBINED_PROMPT_HEAD,
+                schema_overview,
+                _COMBINED_PROMPT_MID1,
+                question,
+                _COMBINED_PROMPT_MID2,
+                previous_context,
+                _COMBINED_PROMPT_TAIL,
+            )
+        )
+        try:
+            decision = self.combined_llm.invoke(
+                [
+                    SystemMessage(content=prompt),
+                    HumanMessage(content=question),
+                ]
+            )
+        except Exception as exc:
+            safe_message = redact_sensitive_text(str(exc))
+            self.logger.warning(
+                "Combined route+intent call failed; using separate calls: %s",
+                safe_message,
+            )
+            return None
+
+        self.logger.info(
+            "Combined decision route=%s intent=%s",
+            decision.route,
+            decision.intent,
+        )
+        self._store_cached_decision(
+            self._combined_decision_cache,
+            cache_key,
+            (decision.route, decision.route_reason, decision.intent, decision.intent_reason),
+        )
+        return {
+            "route": decision.route,
+            "route_reason": decision.route_reason,
+            "intent": decision.intent,
+            "intent_reason": decision.intent_reason,
+            "attempts": state.get("attempts", 0),
+        }
+
     def _build_metadata_context(self, state: DashboardState) -> DashboardState:
         context = self.metadata_service.build(
             question=state["question"],
@@ -304,6 +600,14 @@ class TaxiDashboardAgent:
         return {"metadata_context": context}
 
     def _build_previous_context_text(self, state: DashboardState) -> str:
+        # ask() precomputes this once per request; nodes read the cached
+        # text instead of redoing truncation and formatting three times.
+        cached = state.get("previous_context_text", "")
+        if cached:
+            return cached
+        return self._compute_previous_context_text(state)
+
+    def _compute_previous_context_text(self, state: DashboardState) -> str:
         previous_question = self._truncate_prompt_piece(
             state.get("previous_question", "")
         )
@@ -382,25 +686,37 @@ class TaxiDashboardAgent:
     def _tokenize_heuristic_text(text: str) -> set[str]:
         return {token for token in re.findall(r"[a-z0-9_]+", text.lower()) if token}
 
+    # One compiled alternation scans the question in a single pass instead
+    # of one substring scan per hint (matters when LLM outages make this
+    # fallback hot). Hints are matched on normalized (diacritics-stripped)
+    # text.
+    _FOLLOWUP_PHRASE_PATTERN = re.compile(
+        "|".join(
+            map(
+                re.escape,
+                (
+                    "so sanh",
+                    "compare",
+                    "what about",
+                    "how about",
+                    "same filter",
+                    "voi truoc",
+                ),
+            )
+        )
+    )
+    _FOLLOWUP_TOKEN_HINTS = frozenset({"con", "tiep", "again", "vs"})
+
     def _is_followup_question_heuristic(self, question: str, has_previous: bool) -> bool:
         if not has_previous:
             return False
 
         normalized_question = normalize_for_matching(question)
-        phrase_hints = (
-            "so sanh",
-            "compare",
-            "what about",
-            "how about",
-            "same filter",
-            "voi truoc",
-        )
-        if any(hint in normalized_question for hint in phrase_hints):
+        if self._FOLLOWUP_PHRASE_PATTERN.search(normalized_question):
             return True
 
-        token_hints = {"con", "tiep", "again", "vs"}
         question_tokens = self._tokenize_heuristic_text(normalized_question)
-        return bool(question_tokens.intersection(token_hints))
+        return bool(question_tokens.intersection(self._FOLLOWUP_TOKEN_HINTS))
 
     def _invoke_parser_fallback(
         self,
@@ -432,6 +748,73 @@ class TaxiDashboardAgent:
             )
             return None
 
+    @staticmethod
+    def _intent_messages(question: str, previous_context: str) -> list:
+        intent_prompt = "".join(
+            (
+                _INTENT_PROMPT_HEAD,
+                question,
+                _INTENT_PROMPT_MID,
+                previous_context,
+                _INTENT_PROMPT_TAIL,
+            )
+        )
+        return [
+            SystemMessage(content=intent_prompt),
+            HumanMessage(content=question),
+        ]
+
+    def _pending_intent_key(self, state: DashboardState, cache_key: str) -> str:
+        return f"{state.get('thread_id', '')}\0{cache_key}"
+
+    def _get_intent_executor(self) -> ThreadPoolExecutor:
+        if self._intent_executor is None:
+            with self._intent_executor_lock:
+                if self._intent_executor is None:
+                    self._intent_executor = ThreadPoolExecutor(
+                        max_workers=4,
+                        thread_name_prefix="intent-prefetch",
+                    )
+        return self._intent_executor
+
+    def _speculate_intent(self, state: DashboardState, question: str) -> None:
+        """Fire the intent LLM call while the router round trip is pending.
+
+        Best-effort: the wasted call when the route turns out unsupported is
+        accepted in exchange for halving classification latency on the
+        common sql path. Errors surface when the future is consumed.
+        """
+        previous_context = self._build_previous_context_text(state)
+        cache_key = self._decision_cache_key(question, previous_context)
+        if self._get_cached_decision(self._intent_decision_cache, cache_key) is not None:
+            return
+        try:
+            future = self._get_intent_executor().submit(
+                self.intent_llm.invoke,
+                self._intent_messages(question, previous_context),
+            )
+        except Exception:  # pragma: no cover - executor shutdown race
+            return
+        with self._pending_intent_lock:
+            self._pending_intent[self._pending_intent_key(state, cache_key)] = future
+
+    def _pop_pending_intent(
+        self,
+        state: DashboardState,
+        cache_key: str,
+    ) -> Optional["Future[Any]"]:
+        with self._pending_intent_lock:
+            return self._pending_intent.pop(
+                self._pending_intent_key(state, cache_key), None
+            )
+
+    def _discard_pending_intent(self, state: DashboardState) -> None:
+        # Unconsumed prefetch (unsupported route, graph crash): drop the
+        # bookkeeping entry so the map stays bounded.
+        previous_context = self._build_previous_context_text(state)
+        cache_key = self._decision_cache_key(state.get("question", ""), previous_context)
+        self._pop_pending_intent(state, cache_key)
+
     def _determine_intent(self, state: DashboardState) -> DashboardState:
         if state.get("route") != "sql":
             return {
@@ -439,20 +822,37 @@ class TaxiDashboardAgent:
                 "intent_reason": state.get("route_reason", "Unsupported route."),
             }
 
+        precomputed_intent = state.get("intent", "")
+        if precomputed_intent:
+            # The combined route+intent call already classified this turn.
+            return {
+                "intent": precomputed_intent,
+                "intent_reason": state.get("intent_reason", ""),
+            }
+
         question = state["question"]
         previous_context = self._build_previous_context_text(state)
-        intent_prompt = INTENT_SYSTEM_PROMPT.format(
-            question=question,
-            previous_context=previous_context,
-        )
+        cache_key = self._decision_cache_key(question, previous_context)
+        cached = self._get_cached_decision(self._intent_decision_cache, cache_key)
+        if cached is not None:
+            cached_intent, cached_reason = cached
+            self.logger.debug("Intent decision cache hit intent=%s", cached_intent)
+            return {"intent": cached_intent, "intent_reason": cached_reason}
+
+        prefetched = self._pop_pending_intent(state, cache_key)
         try:
-            decision = self.intent_llm.invoke(
-                [
-                    SystemMessage(content=intent_prompt),
-                    HumanMessage(content=question),
-                ]
-            )
+            if prefetched is not None:
+                decision = prefetched.result()
+            else:
+                decision = self.intent_llm.invoke(
+                    self._intent_messages(question, previous_context)
+                )
             self.logger.info("Intent decision=%s", decision.intent)
+            self._store_cached_decision(
+                self._intent_decision_cache,
+                cache_key,
+                (decision.intent, decision.reason),
+            )
             return {"intent": decision.intent, "intent_reason": decision.reason}
         except Exception as exc:
             safe_message = redact_sensitive_text(str(exc))
@@ -468,7 +868,9 @@ class TaxiDashboardAgent:
 
             parsed = self._invoke_parser_fallback(
                 parser=self.intent_output_parser,
-                system_prompt=intent_prompt,
+                system_prompt=_stringify_content(
+                    self._intent_messages(question, previous_context)[0].content
+                ),
                 user_input=question,
                 parser_name="Intent",
             )
@@ -591,19 +993,24 @@ class TaxiDashboardAgent:
         question = state["question"]
         sql_query = state.get("sql_query", "")
         rows = state.get("sql_rows", [])
-        rows_preview = rows[:20]
+        # Single join instead of nested f-string copies; empty results skip
+        # serialization entirely.
+        content = "".join(
+            (
+                "User question:\n",
+                question,
+                "\n\nExecuted SQL:\n",
+                sql_query,
+                "\n\nRows(JSON):\n",
+                _pack_rows_to_budget(rows) if rows else "[]",
+            )
+        )
 
         try:
             response = self.llm.invoke(
                 [
-                    SystemMessage(content=ANSWER_SYSTEM_PROMPT),
-                    HumanMessage(
-                        content=(
-                            f"User question:\n{question}\n\n"
-                            f"Executed SQL:\n{sql_query}\n\n"
-                            f"Rows(JSON):\n{json.dumps(rows_preview, default=str)}"
-                        )
-                    ),
+                    _ANSWER_SYSTEM_MSG,
+                    HumanMessage(content=content),
                 ]
             )
             return {"final_answer": _stringify_content(response.content)}
@@ -683,16 +1090,19 @@ class TaxiDashboardAgent:
         builder.add_node("error_answer", self._error_answer)
 
         builder.add_edge(START, "prepare_schema_context")
-        builder.add_edge("prepare_schema_context", "build_metadata_context")
-        builder.add_edge("build_metadata_context", "route_question")
+        builder.add_edge("prepare_schema_context", "route_question")
+        # Metadata hints are only consumed by SQL generation/repair, so they
+        # are built after routing accepts the question — rejected questions
+        # skip that work entirely.
         builder.add_conditional_edges(
             "route_question",
             self._after_route,
             {
-                "sql_path": "determine_intent",
+                "sql_path": "build_metadata_context",
                 "unsupported_path": "unsupported_answer",
             },
         )
+        builder.add_edge("build_metadata_context", "determine_intent")
         builder.add_conditional_edges(
             "determine_intent",
             self._after_intent,
@@ -727,25 +1137,29 @@ class TaxiDashboardAgent:
 
         return builder.compile()
 
-    def ask(self, question: str, thread_id: str = "default") -> AgentResult:
-        normalized_thread_id = self._normalize_thread_id(thread_id)
-        clean_question = question.strip()
-        if not clean_question:
-            self.logger.warning("Received empty question.")
-            return cast(
-                AgentResult,
-                {
-                    "question": "",
-                    "thread_id": normalized_thread_id,
-                    "route": "unsupported",
-                    "route_reason": "Empty question.",
-                    "attempts": 0,
-                    "final_answer": empty_question_message(),
-                },
-            )
+    def _empty_question_result(self, normalized_thread_id: str) -> AgentResult:
+        self.logger.warning("Received empty question.")
+        return cast(
+            AgentResult,
+            {
+                "question": "",
+                "thread_id": normalized_thread_id,
+                "route": "unsupported",
+                "route_reason": "Empty question.",
+                "attempts": 0,
+                "final_answer": empty_question_message(),
+            },
+        )
 
+    def _build_initial_state(
+        self,
+        clean_question: str,
+        normalized_thread_id: str,
+    ) -> DashboardState:
         with self._memory_lock:
-            previous_turn = dict(self._conversation_memory.get(normalized_thread_id, {}))
+            # Values are immutable strings replaced wholesale on update, so
+            # reading them under the lock needs no defensive copy.
+            previous_turn = self._conversation_memory.get(normalized_thread_id, {})
         initial_state: DashboardState = {
             "question": clean_question,
             "thread_id": normalized_thread_id,
@@ -754,39 +1168,153 @@ class TaxiDashboardAgent:
             "previous_sql_query": previous_turn.get("sql_query", ""),
             "previous_final_answer": previous_turn.get("final_answer", ""),
         }
+        initial_state["previous_context_text"] = self._compute_previous_context_text(
+            initial_state
+        )
+        return initial_state
+
+    def _finalize_result(
+        self,
+        raw_result: Any,
+        *,
+        clean_question: str,
+        normalized_thread_id: str,
+    ) -> AgentResult:
+        # LangGraph hands back a fresh plain dict the caller owns; mutate it
+        # in place instead of walking every key/value into a copy.
+        if isinstance(raw_result, dict):
+            result = cast(DashboardState, raw_result)
+        else:
+            result = cast(DashboardState, dict(raw_result))
+        result.setdefault("thread_id", normalized_thread_id)
+        if (
+            result.get("route") == "sql"
+            and not result.get("sql_error")
+            and result.get("sql_query")
+        ):
+            self._remember_success_turn(
+                thread_id=normalized_thread_id,
+                question=clean_question,
+                sql_query=str(result.get("sql_query", "")),
+                final_answer=str(result.get("final_answer", "")),
+            )
+        return cast(AgentResult, result)
+
+    def _internal_error_result(
+        self,
+        exc: Exception,
+        *,
+        clean_question: str,
+        normalized_thread_id: str,
+    ) -> AgentResult:
+        message = redact_sensitive_text(str(exc))
+        self.logger.error("Graph execution failed: %s", message)
+        return cast(
+            AgentResult,
+            {
+                "question": clean_question,
+                "thread_id": normalized_thread_id,
+                "route": "unsupported",
+                "route_reason": f"Internal graph error: {message}",
+                "attempts": 0,
+                "sql_error": message,
+                "sql_error_type": "internal",
+                "sql_error_message": message,
+                "final_answer": internal_error_message(clean_question),
+            },
+        )
+
+    def ask(self, question: str, thread_id: str = "default") -> AgentResult:
+        normalized_thread_id = self._normalize_thread_id(thread_id)
+        clean_question = question.strip()
+        if not clean_question:
+            return self._empty_question_result(normalized_thread_id)
+
+        initial_state = self._build_initial_state(clean_question, normalized_thread_id)
         try:
             raw_result = self.graph.invoke(initial_state)
-            result = cast(DashboardState, dict(raw_result))
-            result.setdefault("thread_id", normalized_thread_id)
-            if (
-                result.get("route") == "sql"
-                and not result.get("sql_error")
-                and result.get("sql_query")
-            ):
-                self._remember_success_turn(
-                    thread_id=normalized_thread_id,
-                    question=clean_question,
-                    sql_query=str(result.get("sql_query", "")),
-                    final_answer=str(result.get("final_answer", "")),
-                )
-            return cast(AgentResult, result)
+            return self._finalize_result(
+                raw_result,
+                clean_question=clean_question,
+                normalized_thread_id=normalized_thread_id,
+            )
         except Exception as exc:
-            message = redact_sensitive_text(str(exc))
-            self.logger.error("Graph execution failed: %s", message)
-            return cast(
-                AgentResult,
-                {
-                    "question": clean_question,
-                    "thread_id": normalized_thread_id,
-                    "route": "unsupported",
-                    "route_reason": f"Internal graph error: {message}",
-                    "attempts": 0,
-                    "sql_error": message,
-                    "sql_error_type": "internal",
-                    "sql_error_message": message,
-                    "final_answer": internal_error_message(clean_question),
-                },
+            return self._internal_error_result(
+                exc,
+                clean_question=clean_question,
+                normalized_thread_id=normalized_thread_id,
             )
+        finally:
+            self._discard_pending_intent(initial_state)
+
+    async def aask(self, question: str, thread_id: str = "default") -> AgentResult:
+        """Async counterpart of ``ask`` for event-loop-based hosts.
+
+        Uses ``graph.ainvoke`` so an async server can keep thousands of
+        in-flight questions on one loop instead of pinning a worker thread
+        per request; sync nodes (and injected sync LLMs) are offloaded to
+        the runtime's executor automatically.
+        """
+        normalized_thread_id = self._normalize_thread_id(thread_id)
+        clean_question = question.strip()
+        if not clean_question:
+            return self._empty_question_result(normalized_thread_id)
+
+        initial_state = self._build_initial_state(clean_question, normalized_thread_id)
+        try:
+            raw_result = await self.graph.ainvoke(initial_state)
+            return self._finalize_result(
+                raw_result,
+                clean_question=clean_question,
+                normalized_thread_id=normalized_thread_id,
+            )
+        except Exception as exc:
+            return self._internal_error_result(
+                exc,
+                clean_question=clean_question,
+                normalized_thread_id=normalized_thread_id,
+            )
+        finally:
+            self._discard_pending_intent(initial_state)
+
+    def ask_stream(
+        self,
+        question: str,
+        thread_id: str = "default",
+    ) -> Iterator[AgentResult]:
+        """Stream intermediate graph states instead of blocking on invoke.
+
+        Yields one state snapshot per completed node (route decided, SQL
+        generated, rows fetched, ...) so interactive callers can render
+        progress before the final answer is ready. The last snapshot is the
+        same result ``ask`` would return.
+        """
+        normalized_thread_id = self._normalize_thread_id(thread_id)
+        clean_question = question.strip()
+        if not clean_question:
+            yield self._empty_question_result(normalized_thread_id)
+            return
+
+        initial_state = self._build_initial_state(clean_question, normalized_thread_id)
+        final_snapshot: Any = initial_state
+        try:
+            for snapshot in self.graph.stream(initial_state, stream_mode="values"):
+                final_snapshot = snapshot
+                yield cast(AgentResult, snapshot)
+        except Exception as exc:
+            yield self._internal_error_result(
+                exc,
+                clean_question=clean_question,
+                normalized_thread_id=normalized_thread_id,
+            )
+            return
+        finally:
+            self._discard_pending_intent(initial_state)
+        self._finalize_result(
+            final_snapshot,
+            clean_question=clean_question,
+            normalized_thread_id=normalized_thread_id,
+        )
 
     def get_workflow_mermaid(self) -> str:
         return self.graph.get_graph().draw_mermaid()
@@ -40,6 +40,37 @@ Output format:
 """
 
 
+ROUTE_INTENT_SYSTEM_PROMPT = """
+You are a combined routing and intent agent for a Taxi SQL dashboard.
+Decide both whether the user question can be answered from the available
+PostgreSQL schema and, if so, which SQL task intent it is.
+
+Available tables:
+{schema_overview}
+
+User question:
+{question}
+
+Previous turn context:
+{previous_context}
+
+Return:
+- route="sql" if the question can be answered from the schema tables.
+- route="unsupported" if it cannot (for example asks weather, asks for external data, asks for write actions).
+- intent="sql_query" for a standalone SQL query request.
+- intent="sql_followup" for a follow-up request that depends on previous result/query.
+- intent="unsupported" if it cannot be solved from the current schema.
+
+Output format:
+- Return ONLY a JSON object with keys:
+  - "route": "sql" or "unsupported"
+  - "route_reason": short string
+  - "intent": "sql_query" | "sql_followup" | "unsupported"
+  - "intent_reason": short string
+- Do not include markdown fences.
+"""
+
+
 SQL_GENERATOR_SYSTEM_PROMPT = """
 You are a SQL generation agent.
 Generate one PostgreSQL query for the user question.
@@ -1,18 +1,76 @@
 import re
 
+try:
+    import re2  # linear-time DFA engine; optional
+except Exception:  # pragma: no cover
+    re2 = None  # type: ignore
 
-POSTGRES_URL_PASSWORD_PATTERN = re.compile(
-    r"(?i)(postgres(?:ql)?://[^:\s/]+:)([^@/\s]+)(@)"
+# One combined alternation compiled at import; redact_sensitive_text scans the
+# input a single time instead of once per rule. Each rule is tagged by named
+# groups so the replacement callback rebuilds only the non-secret parts.
+_REDACTION_PATTERN_SOURCE = (
+    r"(?i)"
+    r"(?P<pg_prefix>postgres(?:ql)?://[^:\s/]+:)(?P<pg_secret>[^@/\s]+)(?P<pg_at>@)"
+    r"|(?P<dsn_prefix>password=)(?P<dsn_secret>[^\s]+)"
+    r"|(?P<api_prefix>api[_-]?key(?:\s*[:=]\s*|\s+))(?P<api_secret>[^\s,;]+)"
+    r"|(?P<bearer_prefix>authorization:\s*bearer\s+)(?P<bearer_secret>[^\s]+)"
 )
-DSN_PASSWORD_PATTERN = re.compile(r"(?i)(password=)([^\s]+)")
-API_KEY_PATTERN = re.compile(r"(?i)(api[_-]?key(?:\s*[:=]\s*|\s+))([^\s,;]+)")
-BEARER_PATTERN = re.compile(r"(?i)(authorization:\s*bearer\s+)([^\s]+)")
+
+
+def _redact_match(match: "re.Match[str]") -> str:
+    last_group = match.lastgroup
+    if last_group == "pg_at":
+        return match.group("pg_prefix") + "***" + match.group("pg_at")
+    if last_group == "dsn_secret":
+        return match.group("dsn_prefix") + "***"
+    if last_group == "api_secret":
+        return match.group("api_prefix") + "***"
+    return match.group("bearer_prefix") + "***"
+
+
+def _compile_redaction_pattern():
+    if re2 is not None:
+        try:
+            compiled = re2.compile(_REDACTION_PATTERN_SOURCE)
+            # Probe the full sub() path: the re2 wrapper must support named
+            # groups and lastgroup for the dispatch callback to work.
+            if compiled.sub(_redact_match, "password=probe") == "password=***":
+                return compiled
+        except Exception:  # pragma: no cover
+            pass
+    return re.compile(_REDACTION_PATTERN_SOURCE)
+
+
+COMBINED_REDACTION_PATTERN = _compile_redaction_pattern()
+
+# Cheap lowercase substrings that must appear before any rule can match; most
+# log lines contain none of them, so they skip the regex scan entirely.
+_SENSITIVE_MARKERS = ("postgres", "password=", "api", "authorization:")
 
 
 def redact_sensitive_text(text: str) -> str:
-    redacted = POSTGRES_URL_PASSWORD_PATTERN.sub(r"\1***\3", text)
-    redacted = DSN_PASSWORD_PATTERN.sub(r"\1***", redacted)
-    redacted = API_KEY_PATTERN.sub(r"\1***", redacted)
-    redacted = BEARER_PATTERN.sub(r"\1***", redacted)
-    return redacted
+    lowered = text.lower()
+    if not any(marker in lowered for marker in _SENSITIVE_MARKERS):
+        return text
+    return COMBINED_REDACTION_PATTERN.sub(_redact_match, text)
+
+
+class LazyRedacted:
+    """Defers redaction until the value is actually stringified.
+
+    Pass instances as ``%s`` logging arguments so the scan over multi-KB
+    error messages only runs when the record clears the logger's level.
+    The result is memoized, so logging and then surfacing the same value
+    redacts once.
+    """
+
+    __slots__ = ("_value", "_redacted")
+
+    def __init__(self, value: object) -> None:
+        self._value = value
+        self._redacted: "str | None" = None
 
+    def __str__(self) -> str:
+        if self._redacted is None:
+            self._redacted = redact_sensitive_text(str(self._value))
+        return self._redacted
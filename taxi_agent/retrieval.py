@@ -1,8 +1,9 @@
 from dataclasses import dataclass
 import hashlib
+import heapq
 import logging
 import threading
-from typing import Dict, List, Optional, Sequence
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
@@ -43,43 +44,64 @@ class SchemaRetriever:
         self.keyword_retriever = None
         self.ensemble_retriever = None
         self.schema_fingerprint: str = ""
+        self._table_hashes: Dict[str, str] = {}
+        self._doc_cache: Dict[str, Tuple[str, Document]] = {}
+        self._vectorstore: Optional[InMemoryVectorStore] = None
         self._bm25_dependency_missing = False
         self._state_lock = threading.RLock()
 
-    def _make_schema_fingerprint(self, tables: Sequence[TableSchema]) -> str:
-        hasher = hashlib.sha256()
-        sorted_tables = sorted(tables, key=lambda t: t.full_name.lower())
-        for table in sorted_tables:
-            hasher.update(table.full_name.lower().encode("utf-8"))
-            hasher.update(b"|")
-            for column in sorted(table.columns, key=lambda c: c.ordinal_position):
-                hasher.update(column.column_name.lower().encode("utf-8"))
-                hasher.update(b":")
-                hasher.update(column.data_type.lower().encode("utf-8"))
-                hasher.update(b";")
+    def _table_fingerprint(self, table: TableSchema) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(table.full_name.lower().encode("utf-8"))
+        hasher.update(b"|")
+        for column in sorted(table.columns, key=lambda c: c.ordinal_position):
+            hasher.update(column.column_name.lower().encode("utf-8"))
+            hasher.update(b":")
+            hasher.update(column.data_type.lower().encode("utf-8"))
+            hasher.update(b";")
+        return hasher.hexdigest()
+
+    def _fingerprint_from_table_hashes(self, table_hashes: Dict[str, str]) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        for full_name in sorted(table_hashes):
+            hasher.update(full_name.encode("utf-8"))
+            hasher.update(b"=")
+            hasher.update(table_hashes[full_name].encode("utf-8"))
             hasher.update(b"||")
         return hasher.hexdigest()
 
+    def _make_schema_fingerprint(self, tables: Sequence[TableSchema]) -> str:
+        return self._fingerprint_from_table_hashes(
+            {t.full_name.lower(): self._table_fingerprint(t) for t in tables}
+        )
+
     def _table_to_document(self, table: TableSchema) -> Document:
-        column_lines = [f"- {c.column_name} ({c.data_type})" for c in table.columns]
-        content = (
-            f"Table: {table.full_name}\n"
-            "Columns:\n"
-            + "\n".join(column_lines)
+        content = "".join(
+            (
+                "Table: ",
+                table.full_name,
+                "\nColumns:",
+                *(f"\n- {c.column_name} ({c.data_type})" for c in table.columns),
+            )
         )
+        schema_lower = table.table_schema.lower()
+        name_lower = table.table_name.lower()
         return Document(
             page_content=content,
             metadata={
-                "full_name": table.full_name.lower(),
-                "table_name": table.table_name.lower(),
-                "table_schema": table.table_schema.lower(),
+                "full_name": f"{schema_lower}.{name_lower}",
+                "table_name": name_lower,
+                "table_schema": schema_lower,
             },
         )
 
     def refresh(self, tables: Sequence[TableSchema]) -> None:
         with self._state_lock:
             self.table_map = {t.full_name.lower(): t for t in tables}
-            fingerprint = self._make_schema_fingerprint(tables)
+            table_hashes = {
+                t.full_name.lower(): self._table_fingerprint(t) for t in tables
+            }
+            fingerprint = self._fingerprint_from_table_hashes(table_hashes)
             if fingerprint == self.schema_fingerprint:
                 has_vector = self.retriever is not None
                 has_keyword = self.keyword_retriever is not None
@@ -93,7 +115,21 @@ class SchemaRetriever:
                     return
 
             self.schema_fingerprint = fingerprint
-            docs = [self._table_to_document(t) for t in tables]
+
+            # Rebuild Document objects only for tables whose fingerprint moved.
+            docs: List[Document] = []
+            new_doc_cache: Dict[str, Tuple[str, Document]] = {}
+            for table in tables:
+                table_id = table.full_name.lower()
+                table_hash = table_hashes[table_id]
+                cached = self._doc_cache.get(table_id)
+                if cached is not None and cached[0] == table_hash:
+                    doc = cached[1]
+                else:
+                    doc = self._table_to_document(table)
+                new_doc_cache[table_id] = (table_hash, doc)
+                docs.append(doc)
+            self._doc_cache = new_doc_cache
 
             if BM25Retriever is not None and not self._bm25_dependency_missing:
                 try:
@@ -114,11 +150,38 @@ class SchemaRetriever:
 
             if not self.embedding_model:
                 self.retriever = None
+                self._vectorstore = None
             else:
                 try:
-                    vectorstore = InMemoryVectorStore(self.embedding_model)
                     ids = [t.full_name.lower() for t in tables]
-                    vectorstore.add_documents(docs, ids=ids)
+                    if self._vectorstore is not None and self.retriever is not None:
+                        # Incremental maintenance: only changed tables are
+                        # re-embedded; unchanged vectors stay in place.
+                        old_hashes = self._table_hashes
+                        changed = [
+                            table_id
+                            for table_id, table_hash in table_hashes.items()
+                            if old_hashes.get(table_id) != table_hash
+                        ]
+                        removed = [
+                            table_id
+                            for table_id in old_hashes
+                            if table_id not in table_hashes
+                        ]
+                        stale = changed + removed
+                        if stale:
+                            self._vectorstore.delete(ids=stale)
+                        if changed:
+                            docs_by_id = dict(zip(ids, docs))
+                            self._vectorstore.add_documents(
+                                [docs_by_id[table_id] for table_id in changed],
+                                ids=changed,
+                            )
+                        vectorstore = self._vectorstore
+                    else:
+                        vectorstore = InMemoryVectorStore(self.embedding_model)
+                        vectorstore.add_documents(docs, ids=ids)
+                        self._vectorstore = vectorstore
 
                     search_kwargs = {"k": self.config.top_k_tables}
                     if self.config.search_type == "mmr":
@@ -139,6 +202,9 @@ class SchemaRetriever:
                         safe_message,
                     )
                     self.retriever = None
+                    self._vectorstore = None
+
+            self._table_hashes = table_hashes
 
             self.ensemble_retriever = None
             if EnsembleRetriever is not None:
@@ -189,21 +255,21 @@ class SchemaRetriever:
             if not docs:
                 return list(self.table_map.values())[: self.config.top_k_tables]
 
-            selected: List[TableSchema] = []
-            seen = set()
-            for doc in docs:
+            # Reciprocal Rank Fusion over the merged doc list: duplicates from
+            # different retrievers reinforce each other instead of being
+            # dropped by first-seen order.
+            scores: Dict[str, float] = {}
+            for rank, doc in enumerate(docs):
                 key = str(doc.metadata.get("full_name", "")).lower()
-                if key in seen:
-                    continue
-                table = self.table_map.get(key)
-                if table is None:
-                    continue
-                seen.add(key)
-                selected.append(table)
-                if len(selected) >= self.config.top_k_tables:
-                    break
-
-            if selected:
-                return selected
-
-            return list(self.table_map.values())[: self.config.top_k_tables]
+                if key in self.table_map:
+                    scores[key] = scores.get(key, 0.0) + 1.0 / (60.0 + rank)
+
+            if not scores:
+                return list(self.table_map.values())[: self.config.top_k_tables]
+
+            top = heapq.nlargest(
+                self.config.top_k_tables,
+                scores.items(),
+                key=lambda item: item[1],
+            )
+            return [self.table_map[key] for key, _ in top]
@@ -1,15 +1,16 @@
 from dataclasses import dataclass
+import io
 from typing import List, Sequence
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ColumnSchema:
     column_name: str
     data_type: str
     ordinal_position: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TableSchema:
     table_schema: str
     table_name: str
@@ -39,15 +40,21 @@ def build_schema_context(
     if not tables:
         return "No schema available."
 
-    lines = []
+    buffer = io.StringIO()
+    write = buffer.write
     for table in tables:
-        lines.append(f"Table: {table.full_name}")
-        lines.append("Columns:")
+        write("Table: ")
+        write(table.full_name)
+        write("\nColumns:\n")
         for col in table.columns[:max_columns_per_table]:
-            lines.append(f"- {col.column_name} ({col.data_type})")
-        lines.append("")
-
-    text = "\n".join(lines).strip()
+            write("- ")
+            write(col.column_name)
+            write(" (")
+            write(col.data_type)
+            write(")\n")
+        write("\n")
+
+    text = buffer.getvalue().strip()
     if max_chars > 0 and len(text) > max_chars:
         if max_chars <= 3:
             return text[:max_chars]
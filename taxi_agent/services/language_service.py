@@ -1,44 +1,56 @@
+from functools import lru_cache
 import re
 import unicodedata
 
 
-VIETNAMESE_CHAR_PATTERN = re.compile(
-    r"[\u0103\u00e2\u0111\u00ea\u00f4\u01a1\u01b0"
-    r"\u00e1\u00e0\u1ea3\u00e3\u1ea1\u1eaf\u1eb1\u1eb3\u1eb5\u1eb7\u1ea5\u1ea7\u1ea9\u1eab\u1ead"
-    r"\u00e9\u00e8\u1ebb\u1ebd\u1eb9\u1ebf\u1ec1\u1ec3\u1ec5\u1ec7"
-    r"\u00ed\u00ec\u1ec9\u0129\u1ecb"
-    r"\u00f3\u00f2\u1ecf\u00f5\u1ecd\u1ed1\u1ed3\u1ed5\u1ed7\u1ed9\u1edb\u1edd\u1edf\u1ee1\u1ee3"
-    r"\u00fa\u00f9\u1ee7\u0169\u1ee5\u1ee9\u1eeb\u1eed\u1eef\u1ef1"
-    r"\u00fd\u1ef3\u1ef7\u1ef9\u1ef5]"
+_VIETNAMESE_CHARS_LOWER = (
+    "\u0103\u00e2\u0111\u00ea\u00f4\u01a1\u01b0"
+    "\u00e1\u00e0\u1ea3\u00e3\u1ea1\u1eaf\u1eb1\u1eb3\u1eb5\u1eb7\u1ea5\u1ea7\u1ea9\u1eab\u1ead"
+    "\u00e9\u00e8\u1ebb\u1ebd\u1eb9\u1ebf\u1ec1\u1ec3\u1ec5\u1ec7"
+    "\u00ed\u00ec\u1ec9\u0129\u1ecb"
+    "\u00f3\u00f2\u1ecf\u00f5\u1ecd\u1ed1\u1ed3\u1ed5\u1ed7\u1ed9\u1edb\u1edd\u1edf\u1ee1\u1ee3"
+    "\u00fa\u00f9\u1ee7\u0169\u1ee5\u1ee9\u1eeb\u1eed\u1eef\u1ef1"
+    "\u00fd\u1ef3\u1ef7\u1ef9\u1ef5"
 )
 
-VIETNAMESE_HINT_PATTERNS = [
-    re.compile(r"\bbao\s+nhieu\b"),
-    re.compile(r"\btrong\b"),
-    re.compile(r"\bhay\b"),
-    re.compile(r"\bcho\s+biet\b"),
-    re.compile(r"\btinh\b"),
-    re.compile(r"\bthang\b"),
-    re.compile(r"\bnam\b"),
-    re.compile(r"\bchuyen\b"),
-    re.compile(r"\bdoanh\s+thu\b"),
-    re.compile(r"\bdu\s+lieu\b"),
-]
+# Both cases live in the set so detection needs no .lower() copy of the input.
+VIETNAMESE_CHARS = frozenset(_VIETNAMESE_CHARS_LOWER + _VIETNAMESE_CHARS_LOWER.upper())
+
+# Base letters aligned position-by-position with _VIETNAMESE_CHARS_LOWER, used
+# to strip diacritics in one C-level translate pass.
+_VIETNAMESE_BASE_LETTERS = (
+    "aadeoou" + "a" * 15 + "e" * 10 + "i" * 5 + "o" * 15 + "u" * 10 + "y" * 5
+)
+_VIETNAMESE_TRANSLATION = str.maketrans(
+    _VIETNAMESE_CHARS_LOWER, _VIETNAMESE_BASE_LETTERS
+)
+
+# Single alternation so the text is scanned once instead of once per hint
+# phrase. \W+ between phrase words accepts punctuation as well as spaces, so
+# no pre-pass is needed to scrub the input.
+VIETNAMESE_HINT_PATTERN = re.compile(
+    r"\b(?:bao\W+nhieu|trong|hay|cho\W+biet|tinh|thang|nam|chuyen"
+    r"|doanh\W+thu|du\W+lieu)\b"
+)
 
 
 def normalize_for_matching(text: str) -> str:
-    normalized = unicodedata.normalize("NFD", text.lower())
+    translated = text.lower().translate(_VIETNAMESE_TRANSLATION)
+    if translated.isascii():
+        return translated
+
+    # Non-Vietnamese diacritics remain; fall back to full Unicode folding.
+    normalized = unicodedata.normalize("NFD", translated)
     without_marks = "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
     return without_marks.replace("đ", "d")
 
 
+@lru_cache(maxsize=512)
 def is_probably_vietnamese(text: str) -> bool:
-    lowered = text.lower()
-    if VIETNAMESE_CHAR_PATTERN.search(lowered):
+    if any(ch in VIETNAMESE_CHARS for ch in text):
         return True
 
-    normalized = re.sub(r"[^\w\s]", " ", lowered)
-    return any(pattern.search(normalized) for pattern in VIETNAMESE_HINT_PATTERNS)
+    return VIETNAMESE_HINT_PATTERN.search(text.lower()) is not None
 
 
 def fallback_no_data_message(question: str) -> str:
@@ -1,13 +1,20 @@
+from functools import lru_cache
 import re
-import unicodedata
-from typing import List
+from typing import FrozenSet, List
+
+from .language_service import normalize_for_matching as _normalize_text
 
 
 TOKEN_PATTERN = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
-DATE_PATTERN = re.compile(r"\b\d{4}-\d{2}(?:-\d{2})?\b")
-QUARTER_PATTERN = re.compile(r"\bq[1-4]\s*20\d{2}\b", re.IGNORECASE)
-YEAR_MONTH_PATTERN = re.compile(r"\b(?:19|20)\d{2}[/-](?:0?[1-9]|1[0-2])\b")
-QUOTED_VALUE_PATTERN = re.compile(r"[\"']([^\"']{1,80})[\"']")
+# One alternation so the question is scanned once for all filter-value shapes;
+# the quoted branch is the only one that extracts a subgroup.
+DETECTED_VALUE_PATTERN = re.compile(
+    r"(?P<date>\b\d{4}-\d{2}(?:-\d{2})?\b)"
+    r"|(?P<quarter>\bq[1-4]\s*20\d{2}\b)"
+    r"|(?P<year_month>\b(?:19|20)\d{2}[/-](?:0?[1-9]|1[0-2])\b)"
+    r"|[\"'](?P<quoted>[^\"']{1,80})[\"']",
+    re.IGNORECASE,
+)
 GENERIC_STOPWORDS = {
     "table",
     "tables",
@@ -31,10 +38,10 @@ def _tokenize(text: str) -> List[str]:
     return [match.group(0).lower() for match in TOKEN_PATTERN.finditer(text)]
 
 
-def _normalize_text(text: str) -> str:
-    normalized = unicodedata.normalize("NFD", text.lower())
-    without_marks = "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
-    return without_marks.replace("đ", "d")
+@lru_cache(maxsize=8)
+def _schema_token_set(schema_context: str) -> FrozenSet[str]:
+    """Tokenize a schema context once; it only changes on schema refresh."""
+    return frozenset(_tokenize(_normalize_text(schema_context)))
 
 
 def _truncate(value: str, max_chars: int) -> str:
@@ -71,21 +78,17 @@ class MetadataContextService:
             ):
                 matched_tables.append(table_name.lower())
 
-        schema_tokens = set(_tokenize(_normalize_text(schema_context)))
+        schema_tokens = _schema_token_set(schema_context)
         likely_columns = sorted(
-            {
-                token
-                for token in question_tokens
-                if token in schema_tokens and token not in GENERIC_STOPWORDS
-            }
+            (question_tokens & schema_tokens) - GENERIC_STOPWORDS
         )[:20]
 
         detected_values = sorted(
             {
-                *[match.group(0) for match in DATE_PATTERN.finditer(question)],
-                *[match.group(0) for match in QUARTER_PATTERN.finditer(question)],
-                *[match.group(0) for match in YEAR_MONTH_PATTERN.finditer(question)],
-                *[item.strip() for item in QUOTED_VALUE_PATTERN.findall(question)],
+                match.group("quoted").strip()
+                if match.lastgroup == "quoted"
+                else match.group(0)
+                for match in DETECTED_VALUE_PATTERN.finditer(question)
             }
         )
 
@@ -1,23 +1,67 @@
 import logging
+import sys
 import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
-from time import monotonic
-from typing import List, Sequence
+from functools import lru_cache
+from itertools import chain
+from time import monotonic_ns
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 from ..db import PostgresClient
-from ..redaction import redact_sensitive_text
+from ..redaction import LazyRedacted
 from ..retrieval import SchemaRetriever
 from ..schema import TableSchema, build_schema_context, build_schema_overview
 
 
+@lru_cache(maxsize=32)
+def _truncate_large_text(value: str, max_chars: int) -> str:
+    return value[: max_chars - 3].rstrip() + "..."
+
+
+@lru_cache(maxsize=256)
+def _allowlist_from_name_pairs(name_pairs) -> "tuple[str, ...]":
+    # dict.fromkeys dedupes in one C pass; the sort stays because allowlist
+    # ordering is part of the service's output contract.
+    return tuple(sorted(dict.fromkeys(chain.from_iterable(name_pairs))))
+
+
+class _RWLock:
+    """Minimal readers-writer lock: concurrent readers, exclusive writers."""
+
+    def __init__(self) -> None:
+        self._readers_lock = threading.Lock()
+        self._writer_lock = threading.Lock()
+        self._readers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._readers_lock:
+            self._readers += 1
+            if self._readers == 1:
+                self._writer_lock.acquire()
+        try:
+            yield
+        finally:
+            with self._readers_lock:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._writer_lock.release()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._writer_lock:
+            yield
+
+
 @dataclass(frozen=True)
 class SchemaContextResult:
     schema_error: str
     schema_overview: str
     schema_context: str
     schema_context_full: str
-    allowed_tables: List[str]
-    all_allowed_tables: List[str]
+    allowed_tables: Tuple[str, ...]
+    all_allowed_tables: Tuple[str, ...]
 
 
 class SchemaService:
@@ -44,12 +88,19 @@ class SchemaService:
         self.cache_ttl_seconds = cache_ttl_seconds
         self.logger = logger
 
-        self._cached_tables: List[TableSchema] = []
+        self._cached_tables: Tuple[TableSchema, ...] = ()
         self._cache_loaded: bool = False
-        self._cache_expiry: float = 0.0
-        self._cache_lock = threading.RLock()
+        self._cache_expiry_ns: int = 0
+        self._cache_lock = _RWLock()
+        self._loading_event: "threading.Event | None" = None
+        # Lowered (table_name, full_name) pairs keyed by id() of the cached
+        # TableSchema objects; retrieval hands back those same objects.
+        self._name_pairs_by_id: "dict[int, tuple[str, str]]" = {}
+        # None until probed; False once the LangChain table-info path is known
+        # to be absent or broken, so later calls skip straight to the fallback.
+        self._langchain_supported: Optional[bool] = None
         self._cached_schema_overview: str = "No schema overview available."
-        self._cached_all_allowed_tables: List[str] = []
+        self._cached_all_allowed_tables: Tuple[str, ...] = ()
         self._cached_full_context: str = ""
 
     @staticmethod
@@ -58,6 +109,10 @@ class SchemaService:
             return value
         if max_chars <= 3:
             return value[:max_chars]
+        if len(value) > 4096:
+            # Repeated truncations of the same large context (e.g. repair
+            # retries against an unchanged schema) reuse the cached cut.
+            return _truncate_large_text(value, max_chars)
         return value[: max_chars - 3].rstrip() + "..."
 
     def _build_context_with_langchain(
@@ -65,19 +120,24 @@ class SchemaService:
         tables: Sequence[TableSchema],
         max_chars: int,
     ) -> str:
+        if self._langchain_supported is False:
+            return ""
+
         get_table_info = getattr(self.db, "get_table_info", None)
         if not callable(get_table_info):
+            self._langchain_supported = False
             return ""
 
         try:
             table_names = [table.table_name for table in tables]
             context = get_table_info(table_names, table_schema=self.db_schema)
+            self._langchain_supported = True
             return self._truncate_text(context, max_chars)
         except Exception as exc:
-            safe_message = redact_sensitive_text(str(exc))
+            self._langchain_supported = False
             self.logger.warning(
                 "LangChain SQLDatabase table info unavailable; fallback to custom context: %s",
-                safe_message,
+                LazyRedacted(exc),
             )
             return ""
 
@@ -87,87 +147,147 @@ class SchemaService:
         max_chars: int,
     ) -> str:
         library_context = self._build_context_with_langchain(tables, max_chars)
-        if library_context:
-            return library_context
-        return build_schema_context(
-            tables=tables,
-            max_columns_per_table=self.max_columns_per_table,
-            max_chars=max_chars,
-        )
+        if not library_context:
+            library_context = build_schema_context(
+                tables=tables,
+                max_columns_per_table=self.max_columns_per_table,
+                max_chars=max_chars,
+            )
+        # Interning lets downstream prompt caches keyed by this context hit
+        # the identity/hash fast path; keep huge contexts out of the table.
+        if len(library_context) <= 1_048_576:
+            library_context = sys.intern(library_context)
+        return library_context
 
     def _is_cache_valid(self) -> bool:
-        return self._cache_loaded and monotonic() < self._cache_expiry
+        return self._cache_loaded and monotonic_ns() < self._cache_expiry_ns
 
-    def _load_all_tables(self) -> List[TableSchema]:
-        with self._cache_lock:
-            if self._is_cache_valid():
-                self.logger.info("Schema cache hit (%d tables).", len(self._cached_tables))
-                return list(self._cached_tables)
+    def _load_all_tables(self) -> Tuple[TableSchema, ...]:
+        while True:
+            with self._cache_lock.read():
+                if self._is_cache_valid():
+                    self.logger.info(
+                        "Schema cache hit (%d tables).", len(self._cached_tables)
+                    )
+                    return self._cached_tables
 
-            self.logger.info("Schema cache miss; loading from PostgreSQL.")
-            tables = self.db.get_table_schemas(table_schema=self.db_schema)
-            self._cached_tables = list(tables)
-            self._cache_loaded = True
-            self._cache_expiry = monotonic() + self.cache_ttl_seconds
-            self._cached_schema_overview = build_schema_overview(tables=self._cached_tables)
-            self._cached_all_allowed_tables = self._build_allowlist(self._cached_tables)
-            self._cached_full_context = ""
-            self.logger.info(
-                "Loaded %d tables for schema '%s'.",
-                len(self._cached_tables),
-                self.db_schema,
+            wait_event = None
+            with self._cache_lock.write():
+                # Double-check: another thread may have reloaded while we waited.
+                if self._is_cache_valid():
+                    self.logger.info(
+                        "Schema cache hit (%d tables).", len(self._cached_tables)
+                    )
+                    return self._cached_tables
+                if self._loading_event is not None:
+                    wait_event = self._loading_event
+                else:
+                    self._loading_event = threading.Event()
+
+            if wait_event is None:
+                break
+            # Another thread is loading; wait and re-read instead of issuing a
+            # duplicate PostgreSQL query.
+            wait_event.wait()
+
+        # This thread is the single loader; run the IO outside any lock so
+        # cache-hit readers are not blocked during the round trips.
+        self.logger.info("Schema cache miss; loading from PostgreSQL.")
+        try:
+            tables = tuple(self.db.get_table_schemas(table_schema=self.db_schema))
+            name_pairs_by_id = {
+                id(table): (table.table_name.lower(), table.full_name.lower())
+                for table in tables
+            }
+            schema_overview = build_schema_overview(tables=tables)
+            all_allowed_tables = _allowlist_from_name_pairs(
+                tuple(name_pairs_by_id.values())
             )
-            return list(self._cached_tables)
+            full_context = self._build_context_with_fallback(
+                tables=tables,
+                max_chars=self.full_context_max_chars,
+            )
+        except BaseException:
+            with self._cache_lock.write():
+                loading_event = self._loading_event
+                self._loading_event = None
+            if loading_event is not None:
+                loading_event.set()
+            raise
+
+        with self._cache_lock.write():
+            # Publish every derived field together so readers never observe a
+            # partially refreshed cache.
+            self._cached_tables = tables
+            self._cache_loaded = True
+            self._cache_expiry_ns = monotonic_ns() + self.cache_ttl_seconds * 1_000_000_000
+            self._cached_schema_overview = schema_overview
+            self._cached_all_allowed_tables = all_allowed_tables
+            self._cached_full_context = full_context
+            self._name_pairs_by_id = name_pairs_by_id
+            loading_event = self._loading_event
+            self._loading_event = None
+        if loading_event is not None:
+            loading_event.set()
+        self.logger.info(
+            "Loaded %d tables for schema '%s'.", len(tables), self.db_schema
+        )
+        return tables
 
     def invalidate_cache(self) -> None:
-        with self._cache_lock:
-            self._cached_tables = []
+        with self._cache_lock.write():
+            self._cached_tables = ()
             self._cache_loaded = False
-            self._cache_expiry = 0.0
+            self._cache_expiry_ns = 0
             self._cached_schema_overview = "No schema overview available."
-            self._cached_all_allowed_tables = []
+            self._cached_all_allowed_tables = ()
             self._cached_full_context = ""
+            self._name_pairs_by_id = {}
 
-    @staticmethod
-    def _build_allowlist(tables: Sequence[TableSchema]) -> List[str]:
-        allowed: List[str] = []
-        for table in tables:
-            allowed.append(table.table_name.lower())
-            allowed.append(table.full_name.lower())
-        return sorted(set(allowed))
+    def _build_allowlist(self, tables: Sequence[TableSchema]) -> Tuple[str, ...]:
+        pairs_by_id = self._name_pairs_by_id
+        name_pairs = tuple(
+            pairs_by_id.get(id(table))
+            or (table.table_name.lower(), table.full_name.lower())
+            for table in tables
+        )
+        return _allowlist_from_name_pairs(name_pairs)
+
+    def _top_k_fallback(
+        self, all_tables: Tuple[TableSchema, ...]
+    ) -> Tuple[TableSchema, ...]:
+        if self.top_k_tables >= len(all_tables):
+            return all_tables
+        return all_tables[: self.top_k_tables]
 
     def _get_cached_schema_overview(self) -> str:
-        with self._cache_lock:
+        with self._cache_lock.read():
             return self._cached_schema_overview
 
-    def _get_cached_all_allowed_tables(self) -> List[str]:
-        with self._cache_lock:
-            return list(self._cached_all_allowed_tables)
+    def _get_cached_all_allowed_tables(self) -> Tuple[str, ...]:
+        with self._cache_lock.read():
+            return self._cached_all_allowed_tables
 
-    def _get_full_schema_context(self, all_tables: Sequence[TableSchema]) -> str:
-        with self._cache_lock:
-            if self._cached_full_context:
-                return self._cached_full_context
-
-            self._cached_full_context = self._build_context_with_fallback(
-                tables=all_tables,
-                max_chars=self.full_context_max_chars,
-            )
+    def _get_full_schema_context(self) -> str:
+        # Populated eagerly by _load_all_tables; this is a pure read.
+        with self._cache_lock.read():
             return self._cached_full_context
 
     def build_for_question(self, question: str) -> SchemaContextResult:
         try:
             all_tables = self._load_all_tables()
         except Exception as exc:
-            safe_message = redact_sensitive_text(str(exc))
+            # The error string is surfaced to the client, so redaction runs
+            # regardless; the lazy wrapper just keeps it to a single scan.
+            safe_message = LazyRedacted(exc)
             self.logger.error("Failed to load schema from PostgreSQL: %s", safe_message)
             return SchemaContextResult(
                 schema_error=f"Cannot read schema from PostgreSQL: {safe_message}",
                 schema_overview="No schema overview available.",
                 schema_context="No schema context available.",
                 schema_context_full="No schema context available.",
-                allowed_tables=[],
-                all_allowed_tables=[],
+                allowed_tables=(),
+                all_allowed_tables=(),
             )
 
         if not all_tables:
@@ -176,8 +296,8 @@ class SchemaService:
                 schema_overview="No tables found.",
                 schema_context="No schema context available.",
                 schema_context_full="No schema context available.",
-                allowed_tables=[],
-                all_allowed_tables=[],
+                allowed_tables=(),
+                all_allowed_tables=(),
             )
 
         try:
@@ -187,30 +307,34 @@ class SchemaService:
                 self.logger.warning(
                     "Schema retriever returned no tables; fallback to top-k tables."
                 )
-                relevant_tables = all_tables[: self.top_k_tables]
+                relevant_tables = self._top_k_fallback(all_tables)
             self.logger.info(
                 "Schema retrieval selected %d/%d tables.",
                 len(relevant_tables),
                 len(all_tables),
             )
         except Exception as exc:
-            safe_message = redact_sensitive_text(str(exc))
             self.logger.warning(
                 "Schema retrieval failed, fallback to top-k tables: %s",
-                safe_message,
+                LazyRedacted(exc),
             )
-            relevant_tables = all_tables[: self.top_k_tables]
+            relevant_tables = self._top_k_fallback(all_tables)
 
-        allowed_tables = self._build_allowlist(relevant_tables)
         all_allowed_tables = self._get_cached_all_allowed_tables()
         if not all_allowed_tables:
             all_allowed_tables = self._build_allowlist(all_tables)
+        if relevant_tables is all_tables:
+            # Retrieval covered the whole schema; the cached allowlist is
+            # already exactly what _build_allowlist would produce.
+            allowed_tables = all_allowed_tables
+        else:
+            allowed_tables = self._build_allowlist(relevant_tables)
 
         schema_context = self._build_context_with_fallback(
             tables=relevant_tables,
             max_chars=self.context_max_chars,
         )
-        schema_context_full = self._get_full_schema_context(all_tables)
+        schema_context_full = self._get_full_schema_context()
         schema_overview = self._get_cached_schema_overview()
 
         return SchemaContextResult(
@@ -1,6 +1,8 @@
+import asyncio
 import logging
 import re
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, List, Protocol, Tuple
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
@@ -20,6 +22,18 @@ class SQLDraftOutput(BaseModel):
     reasoning: str = Field("", description="Short explanation")
 
 
+class SQLDraftLike(Protocol):
+    """Shape every SQL-draft producer must satisfy.
+
+    Both the structured-output model bound to the LLM and the parser
+    fallback default ``reasoning`` to an empty string, so call sites can
+    read the attribute directly instead of probing with ``getattr``.
+    """
+
+    sql: str
+    reasoning: str
+
+
 def _stringify_message_content(message: Any) -> str:
     content = getattr(message, "content", message)
     if isinstance(content, str):
@@ -27,45 +41,96 @@ def _stringify_message_content(message: Any) -> str:
     return str(content)
 
 
+# All category markers in one alternation so an error message is scanned once;
+# each branch is named after the category it maps to. "connection timeout" is
+# intentionally absent from the connection branch: the timeout branch claims
+# it, matching the category priority below.
+_SQL_ERROR_CATEGORY_PATTERN = re.compile(
+    r"(?P<allowlist>outside allowed schema context)"
+    r"|(?P<guard>only one sql statement is allowed"
+    r"|only select queries are allowed"
+    r"|select into is not allowed"
+    r"|locking clauses are not allowed"
+    r"|write or destructive sql is not allowed"
+    r"|query must reference at least one table"
+    r"|sql is empty)"
+    r"|(?P<timeout>timeout)"
+    r"|(?P<provider>401|403|unauthorized|forbidden|invalid api key|user not found)"
+    r"|(?P<connection>connection refused"
+    r"|could not connect"
+    r"|connection timed out"
+    r"|connection is lost"
+    r"|server closed the connection unexpectedly"
+    r"|could not translate host name"
+    r"|temporary failure in name resolution"
+    r"|name or service not known)",
+    re.IGNORECASE,
+)
+
+# Lower value wins when several categories match the same message.
+_SQL_ERROR_CATEGORY_PRIORITY = {
+    "allowlist": 0,
+    "guard": 1,
+    "timeout": 2,
+    "provider": 3,
+    "connection": 4,
+}
+
+
+def _scan_sql_error_category(sql_error: str) -> str:
+    best_category = "db"
+    best_priority = len(_SQL_ERROR_CATEGORY_PRIORITY)
+    for match in _SQL_ERROR_CATEGORY_PATTERN.finditer(sql_error):
+        category = match.lastgroup or "db"
+        priority = _SQL_ERROR_CATEGORY_PRIORITY[category]
+        if priority < best_priority:
+            best_category = category
+            best_priority = priority
+            if priority == 0:
+                break
+    return best_category
+
+
+_classify_sql_error_cached = lru_cache(maxsize=512)(_scan_sql_error_category)
+
+
 def classify_sql_error(sql_error: str) -> str:
-    lowered = sql_error.lower()
-    guard_markers = (
-        "only one sql statement is allowed",
-        "only select queries are allowed",
-        "select into is not allowed",
-        "locking clauses are not allowed",
-        "write or destructive sql is not allowed",
-        "query must reference at least one table",
-        "sql is empty",
+    # Repair loops tend to resurface the same error string; cache short
+    # messages and fall back to a direct scan for long ones so the cache
+    # never truncates what it classifies.
+    if len(sql_error) <= 512:
+        return _classify_sql_error_cached(sql_error)
+    return _scan_sql_error_category(sql_error)
+
+
+@lru_cache(maxsize=128)
+def _join_allowed_tables(allowed_tables: Tuple[str, ...]) -> str:
+    return ", ".join(allowed_tables)
+
+
+@lru_cache(maxsize=64)
+def _render_sql_system_message(
+    template: str,
+    schema_text: str,
+    allowed_tables_text: str,
+    metadata_context: str,
+    conversation_context: str,
+    row_limit: int,
+) -> SystemMessage:
+    """Format a prompt template once per distinct argument set.
+
+    The schema text dominates the format cost and rarely changes between
+    requests; SystemMessage is immutable, so reuse across calls is safe.
+    """
+    return SystemMessage(
+        content=template.format(
+            schema_text=schema_text,
+            allowed_tables=allowed_tables_text,
+            metadata_context=metadata_context,
+            conversation_context=conversation_context,
+            row_limit=row_limit,
+        )
     )
-    if "outside allowed schema context" in lowered:
-        return "allowlist"
-    if any(marker in lowered for marker in guard_markers):
-        return "guard"
-    if "timeout" in lowered or "statement timeout" in lowered:
-        return "timeout"
-    if (
-        "401" in lowered
-        or "403" in lowered
-        or "unauthorized" in lowered
-        or "forbidden" in lowered
-        or "invalid api key" in lowered
-        or "user not found" in lowered
-    ):
-        return "provider"
-    if (
-        "connection refused" in lowered
-        or "could not connect" in lowered
-        or "connection timeout" in lowered
-        or "connection timed out" in lowered
-        or "connection is lost" in lowered
-        or "server closed the connection unexpectedly" in lowered
-        or "could not translate host name" in lowered
-        or "temporary failure in name resolution" in lowered
-        or "name or service not known" in lowered
-    ):
-        return "connection"
-    return "db"
 
 
 class SQLService:
@@ -83,6 +148,9 @@ class SQLService:
         self.logger = logger
         self.row_limit = row_limit
         self.sql_output_parser = PydanticOutputParser(pydantic_object=SQLDraftOutput)
+        # Constant for the parser's lifetime; building it walks the Pydantic
+        # schema, so do that once instead of per fallback.
+        self._format_instructions = self.sql_output_parser.get_format_instructions()
 
     @staticmethod
     def _is_select_like_sql(sql: str) -> bool:
@@ -106,7 +174,7 @@ class SQLService:
             return [enhanced, *messages[1:]]
         return messages
 
-    def _invoke_sql_draft_with_fallback(self, messages: List[Any]) -> Any:
+    def _invoke_sql_draft_with_fallback(self, messages: List[Any]) -> SQLDraftLike:
         try:
             return self.sql_llm.invoke(messages)
         except Exception as structured_exc:
@@ -123,7 +191,7 @@ class SQLService:
 
             fallback_messages = self._append_json_instructions(
                 messages,
-                self.sql_output_parser.get_format_instructions(),
+                self._format_instructions,
             )
             raw_response = self.raw_llm.invoke(fallback_messages)
             raw_content = _stringify_message_content(raw_response)
@@ -157,18 +225,15 @@ class SQLService:
                 "sql_error_message": msg,
             }
 
-        allowed_tables_text = ", ".join(allowed_tables)
+        allowed_tables_text = _join_allowed_tables(tuple(allowed_tables))
         messages = [
-            SystemMessage(
-                content=SQL_GENERATOR_SYSTEM_PROMPT.format(
-                    schema_text=schema_context,
-                    allowed_tables=allowed_tables_text,
-                    metadata_context=(metadata_context.strip() or "No metadata hints."),
-                    conversation_context=(
-                        conversation_context.strip() or "No prior conversation context."
-                    ),
-                    row_limit=self.row_limit,
-                )
+            _render_sql_system_message(
+                SQL_GENERATOR_SYSTEM_PROMPT,
+                schema_context,
+                allowed_tables_text,
+                metadata_context.strip() or "No metadata hints.",
+                conversation_context.strip() or "No prior conversation context.",
+                self.row_limit,
             ),
             HumanMessage(content=question),
         ]
@@ -188,7 +253,7 @@ class SQLService:
             self.logger.info("Generated SQL draft successfully.")
             return {
                 "sql_query": sql_query,
-                "sql_reasoning": getattr(draft, "reasoning", ""),
+                "sql_reasoning": draft.reasoning,
                 "sql_error": "",
                 "sql_error_type": "",
                 "sql_error_message": "",
@@ -305,18 +370,15 @@ class SQLService:
                 "sql_error_message": msg,
             }
 
-        allowed_tables_text = ", ".join(allowed_tables)
+        allowed_tables_text = _join_allowed_tables(tuple(allowed_tables))
         messages = [
-            SystemMessage(
-                content=SQL_REPAIR_SYSTEM_PROMPT.format(
-                    schema_text=schema_context,
-                    allowed_tables=allowed_tables_text,
-                    metadata_context=(metadata_context.strip() or "No metadata hints."),
-                    conversation_context=(
-                        conversation_context.strip() or "No prior conversation context."
-                    ),
-                    row_limit=self.row_limit,
-                )
+            _render_sql_system_message(
+                SQL_REPAIR_SYSTEM_PROMPT,
+                schema_context,
+                allowed_tables_text,
+                metadata_context.strip() or "No metadata hints.",
+                conversation_context.strip() or "No prior conversation context.",
+                self.row_limit,
             ),
             HumanMessage(
                 content=(
@@ -345,7 +407,240 @@ class SQLService:
                 }
             return {
                 "sql_query": repaired_sql,
-                "sql_reasoning": getattr(draft, "reasoning", ""),
+                "sql_reasoning": draft.reasoning,
+                "attempts": attempts,
+                "sql_error": "",
+                "sql_error_type": "",
+                "sql_error_message": "",
+            }
+        except Exception as exc:
+            raw_message = str(exc)
+            err_type = classify_sql_error(raw_message)
+            safe_message = redact_sensitive_text(raw_message)
+            msg = f"SQL repair failed: {safe_message}"
+            self.logger.error(msg)
+            return {
+                "sql_query": "",
+                "last_failed_sql": failed_sql,
+                "sql_reasoning": "",
+                "attempts": attempts,
+                "sql_error": msg,
+                "sql_error_type": (
+                    err_type if err_type in {"provider", "connection"} else "repair"
+                ),
+                "sql_error_message": safe_message,
+            }
+
+    async def _ainvoke_sql_draft_with_fallback(self, messages: List[Any]) -> SQLDraftLike:
+        try:
+            return await self.sql_llm.ainvoke(messages)
+        except Exception as structured_exc:
+            err_type = classify_sql_error(str(structured_exc))
+            if err_type in {"provider", "connection"}:
+                raise
+
+            self.logger.warning(
+                "Structured SQL output failed; attempting parser fallback: %s",
+                redact_sensitive_text(str(structured_exc)),
+            )
+            if self.raw_llm is None:
+                raise
+
+            fallback_messages = self._append_json_instructions(
+                messages,
+                self._format_instructions,
+            )
+            raw_response = await self.raw_llm.ainvoke(fallback_messages)
+            raw_content = _stringify_message_content(raw_response)
+            try:
+                return self.sql_output_parser.parse(raw_content)
+            except Exception:
+                sql_candidate = normalize_sql(raw_content)
+                if sql_candidate and self._is_select_like_sql(sql_candidate):
+                    return SQLDraftOutput(
+                        sql=sql_candidate,
+                        reasoning="Fallback parsed from raw model output.",
+                    )
+                raise structured_exc
+
+    async def agenerate_sql(
+        self,
+        *,
+        question: str,
+        schema_context: str,
+        allowed_tables: List[str],
+        metadata_context: str = "",
+        conversation_context: str = "",
+    ) -> Dict[str, Any]:
+        """Async counterpart of ``generate_sql`` for event-loop-based hosts.
+
+        Uses ``ainvoke`` on the LLM runnables so concurrent questions share
+        one loop instead of serializing on a blocked worker thread.
+        """
+        if not schema_context or not allowed_tables:
+            msg = "Schema context is empty, cannot generate SQL."
+            return {
+                "sql_query": "",
+                "sql_reasoning": "",
+                "sql_error": msg,
+                "sql_error_type": "schema_context",
+                "sql_error_message": msg,
+            }
+
+        allowed_tables_text = _join_allowed_tables(tuple(allowed_tables))
+        messages = [
+            _render_sql_system_message(
+                SQL_GENERATOR_SYSTEM_PROMPT,
+                schema_context,
+                allowed_tables_text,
+                metadata_context.strip() or "No metadata hints.",
+                conversation_context.strip() or "No prior conversation context.",
+                self.row_limit,
+            ),
+            HumanMessage(content=question),
+        ]
+        try:
+            draft = await self._ainvoke_sql_draft_with_fallback(messages)
+            sql_query = normalize_sql(draft.sql)
+            if not sql_query:
+                msg = "SQL generation failed: model returned empty SQL."
+                self.logger.error(msg)
+                return {
+                    "sql_query": "",
+                    "sql_reasoning": "",
+                    "sql_error": msg,
+                    "sql_error_type": "generation",
+                    "sql_error_message": "model returned empty SQL",
+                }
+            self.logger.info("Generated SQL draft successfully.")
+            return {
+                "sql_query": sql_query,
+                "sql_reasoning": draft.reasoning,
+                "sql_error": "",
+                "sql_error_type": "",
+                "sql_error_message": "",
+            }
+        except Exception as exc:
+            raw_message = str(exc)
+            err_type = classify_sql_error(raw_message)
+            safe_message = redact_sensitive_text(raw_message)
+            msg = f"SQL generation failed: {safe_message}"
+            self.logger.error(msg)
+            return {
+                "sql_query": "",
+                "sql_reasoning": "",
+                "sql_error": msg,
+                "sql_error_type": (
+                    err_type if err_type in {"provider", "connection"} else "generation"
+                ),
+                "sql_error_message": safe_message,
+            }
+
+    async def aexecute_sql(
+        self,
+        *,
+        sql_query: str,
+        allowed_tables: List[str],
+        skip_guard: bool = False,
+    ) -> Dict[str, Any]:
+        """Async counterpart of ``execute_sql``.
+
+        The guard is pure CPU and runs inline; the synchronous DB driver is
+        offloaded with ``asyncio.to_thread`` so a slow query does not starve
+        the event loop.
+        """
+        if not skip_guard:
+            preflight = self.preflight_sql(
+                sql_query=sql_query,
+                allowed_tables=allowed_tables,
+            )
+            if preflight.get("sql_error"):
+                return preflight
+
+        try:
+            rows = await asyncio.to_thread(self.db.run_query, sql_query)
+            self.logger.info("SQL executed successfully with %d rows.", len(rows))
+            return {
+                "sql_rows": rows,
+                "sql_error": "",
+                "sql_error_type": "",
+                "sql_error_message": "",
+            }
+        except Exception as exc:
+            raw_message = str(exc)
+            err_type = classify_sql_error(raw_message)
+            safe_message = redact_sensitive_text(raw_message)
+            self.logger.error("SQL execution failed (%s): %s", err_type, safe_message)
+            return {
+                "sql_rows": [],
+                "sql_error": safe_message,
+                "sql_error_type": err_type,
+                "sql_error_message": safe_message,
+            }
+
+    async def arepair_sql(
+        self,
+        *,
+        question: str,
+        failed_sql: str,
+        sql_error: str,
+        schema_context: str,
+        allowed_tables: List[str],
+        attempts: int,
+        metadata_context: str = "",
+        conversation_context: str = "",
+    ) -> Dict[str, Any]:
+        """Async counterpart of ``repair_sql``."""
+        if not schema_context or not allowed_tables:
+            msg = "Schema context is empty, cannot repair SQL."
+            return {
+                "sql_query": "",
+                "last_failed_sql": failed_sql,
+                "sql_reasoning": "",
+                "attempts": attempts,
+                "sql_error": msg,
+                "sql_error_type": "schema_context",
+                "sql_error_message": msg,
+            }
+
+        allowed_tables_text = _join_allowed_tables(tuple(allowed_tables))
+        messages = [
+            _render_sql_system_message(
+                SQL_REPAIR_SYSTEM_PROMPT,
+                schema_context,
+                allowed_tables_text,
+                metadata_context.strip() or "No metadata hints.",
+                conversation_context.strip() or "No prior conversation context.",
+                self.row_limit,
+            ),
+            HumanMessage(
+                content=(
+                    f"User question:\n{question}\n\n"
+                    f"Failed SQL:\n{failed_sql}\n\n"
+                    f"Database error:\n{sql_error}"
+                )
+            ),
+        ]
+
+        try:
+            draft = await self._ainvoke_sql_draft_with_fallback(messages)
+            self.logger.info("SQL repaired on attempt=%d.", attempts)
+            repaired_sql = normalize_sql(draft.sql)
+            if not repaired_sql:
+                msg = "SQL repair failed: model returned empty SQL."
+                self.logger.error(msg)
+                return {
+                    "sql_query": "",
+                    "last_failed_sql": failed_sql,
+                    "sql_reasoning": "",
+                    "attempts": attempts,
+                    "sql_error": msg,
+                    "sql_error_type": "repair",
+                    "sql_error_message": "model returned empty SQL",
+                }
+            return {
+                "sql_query": repaired_sql,
+                "sql_reasoning": draft.reasoning,
                 "attempts": attempts,
                 "sql_error": "",
                 "sql_error_type": "",
@@ -368,3 +663,70 @@ class SQLService:
                 ),
                 "sql_error_message": safe_message,
             }
+
+    async def arepair_sql_batch(
+        self,
+        *,
+        question: str,
+        failed_sql: str,
+        sql_error: str,
+        schema_context: str,
+        allowed_tables: List[str],
+        attempts: int,
+        n_candidates: int = 2,
+        max_concurrency: int = 2,
+        metadata_context: str = "",
+        conversation_context: str = "",
+    ) -> Dict[str, Any]:
+        """Explore several repair candidates concurrently; first valid wins.
+
+        Fires ``n_candidates`` repair calls under a semaphore (respecting
+        provider rate limits), preflights each candidate through the guard,
+        and returns the first one that passes, cancelling the rest. Falls
+        back to the last failing result when no candidate validates.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def one_candidate() -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.arepair_sql(
+                    question=question,
+                    failed_sql=failed_sql,
+                    sql_error=sql_error,
+                    schema_context=schema_context,
+                    allowed_tables=allowed_tables,
+                    attempts=attempts,
+                    metadata_context=metadata_context,
+                    conversation_context=conversation_context,
+                )
+            if result["sql_error"] or not result["sql_query"]:
+                return result
+            preflight = self.preflight_sql(
+                sql_query=result["sql_query"],
+                allowed_tables=allowed_tables,
+            )
+            if preflight["sql_error"]:
+                return {
+                    **result,
+                    "sql_query": "",
+                    "last_failed_sql": result["sql_query"],
+                    "sql_error": preflight["sql_error"],
+                    "sql_error_type": preflight["sql_error_type"],
+                    "sql_error_message": preflight["sql_error_message"],
+                }
+            return result
+
+        tasks = [
+            asyncio.create_task(one_candidate())
+            for _ in range(max(1, n_candidates))
+        ]
+        last_result: Dict[str, Any] = {}
+        try:
+            for completed in asyncio.as_completed(tasks):
+                last_result = await completed
+                if not last_result["sql_error"]:
+                    return last_result
+            return last_result
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -18,6 +18,7 @@ class DashboardState(TypedDict, total=False):
     previous_question: str
     previous_sql_query: str
     previous_final_answer: str
+    previous_context_text: str
     sql_query: str
     last_failed_sql: str
     sql_reasoning: str
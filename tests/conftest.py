@@ -1,7 +1,20 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from taxi_agent.config import load_settings  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _clear_settings_cache() -> None:
+    # load_settings() is memoized per process; tests mutate the environment
+    # between calls, so drop the cached Settings around every test.
+    load_settings.cache_clear()
+    yield
+    load_settings.cache_clear()
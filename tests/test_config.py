@@ -67,10 +67,23 @@ def test_load_settings_boolean_variants(monkeypatch: pytest.MonkeyPatch) -> None
     assert settings.enable_schema_embeddings is False
 
     monkeypatch.setenv("ENABLE_SCHEMA_EMBEDDINGS", "yes")
+    load_settings.cache_clear()
     settings = load_settings()
     assert settings.enable_schema_embeddings is True
 
 
+def test_load_settings_is_memoized(monkeypatch: pytest.MonkeyPatch) -> None:
+    _set_base_env(monkeypatch)
+    first = load_settings()
+    monkeypatch.setenv("QUERY_ROW_LIMIT", "42")
+    second = load_settings()
+    assert second is first
+
+    load_settings.cache_clear()
+    refreshed = load_settings()
+    assert refreshed.query_row_limit == 42
+
+
 def test_load_settings_invalid_boolean(monkeypatch: pytest.MonkeyPatch) -> None:
     _set_base_env(monkeypatch)
     monkeypatch.setenv("ENABLE_SCHEMA_EMBEDDINGS", "maybe")
@@ -154,6 +167,20 @@ def test_memory_max_threads_invalid(monkeypatch: pytest.MonkeyPatch) -> None:
         load_settings()
 
 
+def test_memory_ttl_seconds_override(monkeypatch: pytest.MonkeyPatch) -> None:
+    _set_base_env(monkeypatch)
+    monkeypatch.setenv("MEMORY_TTL_SECONDS", "600")
+    settings = load_settings()
+    assert settings.memory_ttl_seconds == 600
+
+
+def test_memory_ttl_seconds_invalid(monkeypatch: pytest.MonkeyPatch) -> None:
+    _set_base_env(monkeypatch)
+    monkeypatch.setenv("MEMORY_TTL_SECONDS", "0")
+    with pytest.raises(ValueError):
+        load_settings()
+
+
 def test_db_schema_validation_accepts_valid_identifier(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
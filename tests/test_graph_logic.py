@@ -1,11 +1,18 @@
 from dataclasses import replace
+import time
 from types import SimpleNamespace
 from typing import Any, List
 
 import pytest
 
 from taxi_agent.config import Settings
-from taxi_agent.graph import IntentDecision, RouteDecision, SQLDraft, TaxiDashboardAgent
+from taxi_agent.graph import (
+    CombinedDecision,
+    IntentDecision,
+    RouteDecision,
+    SQLDraft,
+    TaxiDashboardAgent,
+)
 from taxi_agent.schema import ColumnSchema, TableSchema
 
 
@@ -864,6 +871,35 @@ def test_graph_thread_memory_eviction_by_capacity() -> None:
     assert next_a["previous_question"] == ""
 
 
+def test_graph_thread_memory_expires_after_ttl() -> None:
+    cachetools = pytest.importorskip("cachetools")
+
+    tables = _tables()
+    fake_db = FakeDB(tables=tables, rows=[{"id": 1}])
+    fake_llm = FakeLLM(
+        route="sql",
+        intent="sql_query",
+        sql_first="SELECT * FROM public.table_a LIMIT 1",
+        sql_second="SELECT * FROM public.table_a LIMIT 1",
+        answer_text="done",
+    )
+    fake_retriever = FakeRetriever(selected_tables=[tables[0]])
+
+    agent = TaxiDashboardAgent(
+        _settings(),
+        db_client=fake_db,  # type: ignore[arg-type]
+        llm=fake_llm,  # type: ignore[arg-type]
+        schema_retriever=fake_retriever,  # type: ignore[arg-type]
+    )
+    agent._conversation_memory = cachetools.TTLCache(maxsize=10, ttl=0.05)
+
+    _ = agent.ask("Show one row from table_a", thread_id="t-ttl")
+    time.sleep(0.1)
+    stale = agent.ask("còn table_a thì sao?", thread_id="t-ttl")
+
+    assert stale["previous_question"] == ""
+
+
 def test_graph_memory_stores_truncated_turn_values() -> None:
     tables = _tables()
     fake_db = FakeDB(tables=tables, rows=[{"id": 1}])
@@ -953,6 +989,175 @@ def test_graph_error_answer_keeps_last_failed_sql_on_repair_failure() -> None:
     assert "QUALIFY" in result["final_answer"]
 
 
+def test_graph_aask_matches_ask_result() -> None:
+    import asyncio
+
+    tables = _tables()
+    fake_db = FakeDB(tables=tables, rows=[{"id": 1}])
+    fake_llm = FakeLLM(
+        route="sql",
+        intent="sql_query",
+        sql_first="SELECT * FROM public.table_a LIMIT 1",
+        sql_second="SELECT * FROM public.table_a LIMIT 1",
+        answer_text="done",
+    )
+    fake_retriever = FakeRetriever(selected_tables=[tables[0]])
+
+    agent = TaxiDashboardAgent(
+        _settings(),
+        db_client=fake_db,  # type: ignore[arg-type]
+        llm=fake_llm,  # type: ignore[arg-type]
+        schema_retriever=fake_retriever,  # type: ignore[arg-type]
+    )
+    result = asyncio.run(agent.aask("Show one row from table_a", thread_id="t-async"))
+
+    assert result["route"] == "sql"
+    assert result["final_answer"] == "done"
+    follow_up = asyncio.run(agent.aask("còn table_a thì sao?", thread_id="t-async"))
+    assert follow_up["previous_question"] == "Show one row from table_a"
+
+
+def test_pack_rows_to_budget_caps_bytes_and_marks_truncation() -> None:
+    from taxi_agent.graph import _pack_rows_to_budget
+
+    rows = [{"col": "x" * 1000, "id": i} for i in range(50)]
+    packed = _pack_rows_to_budget(rows, max_rows=20, max_bytes=3000)
+
+    assert packed.startswith("[") and packed.endswith("]")
+    assert len(packed) < 5000
+    assert '"_truncated":' in packed.replace(" ", "")
+    assert '"total_rows":50' in packed.replace(" ", "")
+
+    small = _pack_rows_to_budget([{"id": 1}], max_rows=20, max_bytes=3000)
+    assert "_truncated" not in small
+
+
+def test_graph_ask_stream_yields_progress_and_final_answer() -> None:
+    tables = _tables()
+    fake_db = FakeDB(tables=tables, rows=[{"id": 1}])
+    fake_llm = FakeLLM(
+        route="sql",
+        intent="sql_query",
+        sql_first="SELECT * FROM public.table_a LIMIT 1",
+        sql_second="SELECT * FROM public.table_a LIMIT 1",
+        answer_text="done",
+    )
+    fake_retriever = FakeRetriever(selected_tables=[tables[0]])
+
+    agent = TaxiDashboardAgent(
+        _settings(),
+        db_client=fake_db,  # type: ignore[arg-type]
+        llm=fake_llm,  # type: ignore[arg-type]
+        schema_retriever=fake_retriever,  # type: ignore[arg-type]
+    )
+    snapshots = list(agent.ask_stream("Show one row from table_a", thread_id="t-1"))
+
+    assert len(snapshots) > 1
+    final = snapshots[-1]
+    assert final["route"] == "sql"
+    assert final["final_answer"] == "done"
+    # Streaming updates conversation memory the same way ask() does.
+    follow_up = agent.ask("còn table_a thì sao?", thread_id="t-1")
+    assert follow_up["previous_question"] == "Show one row from table_a"
+
+
+def test_graph_uses_combined_route_intent_call_when_supported() -> None:
+    tables = _tables()
+    fake_db = FakeDB(tables=tables, rows=[{"id": 1}])
+    calls = {"combined": 0, "route": 0, "intent": 0}
+
+    class CombinedLLM(FakeLLM):
+        def with_structured_output(self, schema: Any) -> Any:
+            if schema is CombinedDecision:
+                def combined_invoke(messages: Any) -> Any:
+                    _ = messages
+                    calls["combined"] += 1
+                    return SimpleNamespace(
+                        route="sql",
+                        route_reason="fused",
+                        intent="sql_query",
+                        intent_reason="fused",
+                    )
+
+                return SimpleNamespace(invoke=combined_invoke)
+            if schema is RouteDecision:
+                calls["route"] += 1
+            if schema is IntentDecision:
+                calls["intent"] += 1
+            return super().with_structured_output(schema)
+
+    fake_llm = CombinedLLM(
+        sql_first="SELECT * FROM public.table_a LIMIT 1",
+        sql_second="SELECT * FROM public.table_a LIMIT 1",
+        answer_text="done",
+    )
+    fake_retriever = FakeRetriever(selected_tables=[tables[0]])
+
+    agent = TaxiDashboardAgent(
+        _settings(),
+        db_client=fake_db,  # type: ignore[arg-type]
+        llm=fake_llm,  # type: ignore[arg-type]
+        schema_retriever=fake_retriever,  # type: ignore[arg-type]
+    )
+    result = agent.ask("Show one row from table_a")
+
+    assert result["route"] == "sql"
+    assert result["intent"] == "sql_query"
+    assert result["intent_reason"] == "fused"
+    assert result["final_answer"] == "done"
+    assert calls["combined"] == 1
+
+
+def test_graph_route_and_intent_decisions_are_cached() -> None:
+    tables = _tables()
+    fake_db = FakeDB(tables=tables, rows=[{"id": 1}])
+    calls = {"route": 0, "intent": 0}
+
+    class CountingLLM(FakeLLM):
+        def with_structured_output(self, schema: Any) -> Any:
+            if schema is RouteDecision:
+                def route_invoke(messages: Any) -> Any:
+                    _ = messages
+                    calls["route"] += 1
+                    return SimpleNamespace(route=self.route, reason=self.route_reason)
+
+                return SimpleNamespace(invoke=route_invoke)
+            if schema is IntentDecision:
+                def intent_invoke(messages: Any) -> Any:
+                    _ = messages
+                    calls["intent"] += 1
+                    return SimpleNamespace(
+                        intent=self.intent,
+                        reason=self.intent_reason,
+                    )
+
+                return SimpleNamespace(invoke=intent_invoke)
+            return super().with_structured_output(schema)
+
+    fake_llm = CountingLLM(
+        route="sql",
+        intent="sql_query",
+        sql_first="SELECT * FROM public.table_a LIMIT 1",
+        sql_second="SELECT * FROM public.table_a LIMIT 1",
+        answer_text="done",
+    )
+    fake_retriever = FakeRetriever(selected_tables=[tables[0]])
+
+    agent = TaxiDashboardAgent(
+        _settings(),
+        db_client=fake_db,  # type: ignore[arg-type]
+        llm=fake_llm,  # type: ignore[arg-type]
+        schema_retriever=fake_retriever,  # type: ignore[arg-type]
+    )
+    first = agent.ask("Show one row from table_a", thread_id="thread-x")
+    second = agent.ask("Show one row from table_a", thread_id="thread-y")
+
+    assert first["route"] == "sql"
+    assert second["route"] == "sql"
+    assert calls["route"] == 1
+    assert calls["intent"] == 1
+
+
 def test_graph_embedding_init_failure_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
     tables = _tables()
     fake_db = FakeDB(tables=tables, rows=[{"id": 1}])
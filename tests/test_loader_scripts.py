@@ -54,5 +54,62 @@ def test_preview_get_csv_path_override(monkeypatch: pytest.MonkeyPatch) -> None:
     assert csv_path == (preview.PROJECT_ROOT / "dataset" / "taxi_trip_data.csv").resolve()
 
 
+def test_get_copy_workers_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("COPY_WORKERS", raising=False)
+    assert loader._get_copy_workers() == 1
+
+
+def test_get_copy_workers_auto(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("COPY_WORKERS", "auto")
+    assert loader._get_copy_workers() >= 1
+
+
+def test_get_copy_workers_invalid(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("COPY_WORKERS", "0")
+    with pytest.raises(ValueError):
+        loader._get_copy_workers()
+
+
+def test_compute_chunk_offsets_newline_aligned(tmp_path: Path) -> None:
+    csv_path = tmp_path / "chunked.csv"
+    lines = [f"row-{i},value-{i}\n" for i in range(100)]
+    csv_path.write_bytes("".join(lines).encode("utf-8"))
+
+    ranges = loader._compute_chunk_offsets(csv_path, workers=4)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == csv_path.stat().st_size
+    data = csv_path.read_bytes()
+    for start, end in ranges:
+        assert start < end
+        # Every range must end exactly after a newline so each worker
+        # streams whole CSV records.
+        assert data[end - 1 : end] == b"\n"
+    for (_, prev_end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert prev_end == next_start
+
+
+def test_choose_copy_buffer_size_bounds(tmp_path: Path) -> None:
+    short_rows = tmp_path / "short.csv"
+    short_rows.write_bytes(b"a,b\n" * 1000)
+    assert loader._choose_copy_buffer_size(short_rows) == loader.MIN_COPY_BUFFER_SIZE
+
+    long_rows = tmp_path / "long.csv"
+    long_rows.write_bytes((b"x" * 4000 + b"\n") * 300)
+    assert loader._choose_copy_buffer_size(long_rows) == loader.MAX_COPY_BUFFER_SIZE
+
+
+def test_choose_copy_buffer_size_no_newlines(tmp_path: Path) -> None:
+    blob = tmp_path / "blob.csv"
+    blob.write_bytes(b"x" * 100)
+    assert loader._choose_copy_buffer_size(blob) == loader.COPY_READ_BUFFER_SIZE
+
+
+def test_compute_chunk_offsets_empty_file(tmp_path: Path) -> None:
+    csv_path = tmp_path / "empty.csv"
+    csv_path.write_bytes(b"")
+    assert loader._compute_chunk_offsets(csv_path, workers=4) == []
+
+
 def test_smoke_run_alias_exists() -> None:
     assert Path("smoke_run.py").exists()
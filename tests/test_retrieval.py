@@ -212,6 +212,47 @@ def test_ensemble_retriever_preferred_when_available(monkeypatch) -> None:
     assert FakeEnsembleRetriever.instances == 1
 
 
+def test_refresh_embeds_only_changed_tables() -> None:
+    class CountingEmbeddings(Embeddings):
+        def __init__(self) -> None:
+            self.embedded_texts: List[str] = []
+
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            self.embedded_texts.extend(texts)
+            return [[0.1, 0.2, 0.3] for _ in texts]
+
+        def embed_query(self, text: str) -> List[float]:
+            _ = text
+            return [0.1, 0.2, 0.3]
+
+    embeddings = CountingEmbeddings()
+    retriever = SchemaRetriever(
+        embedding_model=embeddings,
+        config=SchemaRetrieverConfig(top_k_tables=1, search_type="mmr", fetch_k=20),
+    )
+    tables = _sample_tables()
+
+    retriever.refresh(tables)
+    assert len(embeddings.embedded_texts) == 2
+
+    # Only zones changes; taxi_trip_data must not be re-embedded.
+    changed = [
+        tables[0],
+        TableSchema(
+            table_schema="public",
+            table_name="zones",
+            columns=[
+                ColumnSchema("zone_id", "integer", 1),
+                ColumnSchema("borough", "text", 2),
+                ColumnSchema("service_zone", "text", 3),
+            ],
+        ),
+    ]
+    retriever.refresh(changed)
+    assert len(embeddings.embedded_texts) == 3
+    assert embeddings.embedded_texts[-1].startswith("Table: public.zones")
+
+
 def test_schema_fingerprint_stable_across_table_order() -> None:
     retriever = SchemaRetriever(
         embedding_model=None,
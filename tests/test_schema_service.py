@@ -1,4 +1,6 @@
 import logging
+import threading
+import time
 from typing import List
 
 from taxi_agent.schema import ColumnSchema, TableSchema
@@ -155,7 +157,7 @@ def test_schema_service_fallback_when_retriever_fails() -> None:
     result = service.build_for_question("q")
     assert result.schema_error == ""
     # fallback should pick top_k_tables=1 from all tables.
-    assert result.allowed_tables == ["public.taxi_trip_data", "taxi_trip_data"]
+    assert result.allowed_tables == ("public.taxi_trip_data", "taxi_trip_data")
 
 
 def test_schema_service_fallback_when_retriever_returns_empty() -> None:
@@ -176,7 +178,7 @@ def test_schema_service_fallback_when_retriever_returns_empty() -> None:
 
     result = service.build_for_question("q")
     assert result.schema_error == ""
-    assert result.allowed_tables == ["public.taxi_trip_data", "taxi_trip_data"]
+    assert result.allowed_tables == ("public.taxi_trip_data", "taxi_trip_data")
 
 
 def test_schema_service_caches_empty_schema() -> None:
@@ -274,6 +276,46 @@ def test_schema_service_reuses_cached_full_context() -> None:
     assert db.info_calls == 3
 
 
+def test_schema_service_concurrent_cold_load_queries_db_once() -> None:
+    class SlowDB(FakeDB):
+        def get_table_schemas(self, table_schema: str = "public") -> List[TableSchema]:
+            time.sleep(0.05)
+            return super().get_table_schemas(table_schema)
+
+    tables = _tables()
+    db = SlowDB(tables)
+    retriever = FakeRetriever([tables[0]])
+    service = SchemaService(
+        db=db,  # type: ignore[arg-type]
+        schema_retriever=retriever,  # type: ignore[arg-type]
+        db_schema="public",
+        max_columns_per_table=40,
+        context_max_chars=1000,
+        full_context_max_chars=3000,
+        top_k_tables=1,
+        cache_ttl_seconds=300,
+        logger=logging.getLogger("test.schema"),
+    )
+
+    errors: List[Exception] = []
+
+    def worker() -> None:
+        try:
+            result = service.build_for_question("q")
+            assert result.schema_error == ""
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert db.calls == 1
+
+
 def test_schema_service_redacts_sensitive_connection_error() -> None:
     tables = _tables()
     db = FailingDB(tables)
@@ -1,3 +1,5 @@
+import sqlparse
+
 from taxi_agent.sql_guard import (
     _extract_cte_names,
     normalize_sql,
@@ -137,7 +139,7 @@ def test_extract_cte_names_ignores_select_aliases() -> None:
         "b AS (SELECT p AS q FROM a) "
         "SELECT q AS final_alias FROM b"
     )
-    assert _extract_cte_names(sql) == {"a", "b"}
+    assert _extract_cte_names(sqlparse.parse(sql)) == {"a", "b"}
 
 
 def test_deny_destructive_sql() -> None:
@@ -34,6 +34,9 @@ class FakeSQLLLM:
             raise RuntimeError("llm failed")
         return SimpleNamespace(sql=self.sql, reasoning="ok")
 
+    async def ainvoke(self, messages: Any) -> Any:
+        return self.invoke(messages)
+
 
 class ProviderFailSQLLLM(FakeSQLLLM):
     def invoke(self, messages: Any) -> Any:
@@ -322,3 +325,80 @@ def test_generate_sql_prompt_uses_configured_row_limit() -> None:
     )
     system_prompt = llm.last_messages[0].content
     assert "LIMIT 250" in system_prompt
+
+
+def test_agenerate_and_aexecute_match_sync_behavior() -> None:
+    import asyncio
+
+    service = SQLService(
+        sql_llm=FakeSQLLLM(sql="SELECT * FROM public.taxi_trip_data LIMIT 1"),
+        db=FakeDB(rows=[{"n": 1}]),  # type: ignore[arg-type]
+        logger=logging.getLogger("test.sql"),
+    )
+
+    generated = asyncio.run(
+        service.agenerate_sql(
+            question="q",
+            schema_context="Table: public.taxi_trip_data",
+            allowed_tables=["public.taxi_trip_data", "taxi_trip_data"],
+        )
+    )
+    assert generated["sql_error"] == ""
+    assert generated["sql_query"] == "SELECT * FROM public.taxi_trip_data LIMIT 1"
+
+    executed = asyncio.run(
+        service.aexecute_sql(
+            sql_query=generated["sql_query"],
+            allowed_tables=["public.taxi_trip_data", "taxi_trip_data"],
+        )
+    )
+    assert executed["sql_error"] == ""
+    assert executed["sql_rows"] == [{"n": 1}]
+
+
+def test_arepair_sql_batch_returns_first_valid_candidate() -> None:
+    import asyncio
+
+    service = SQLService(
+        sql_llm=FakeSQLLLM(sql="SELECT * FROM public.taxi_trip_data LIMIT 1"),
+        db=FakeDB(),  # type: ignore[arg-type]
+        logger=logging.getLogger("test.sql"),
+    )
+
+    result = asyncio.run(
+        service.arepair_sql_batch(
+            question="q",
+            failed_sql="SELECT * FROM public.bad_table",
+            sql_error="relation does not exist",
+            schema_context="Table: public.taxi_trip_data",
+            allowed_tables=["public.taxi_trip_data", "taxi_trip_data"],
+            attempts=1,
+            n_candidates=3,
+        )
+    )
+    assert result["sql_error"] == ""
+    assert result["sql_query"] == "SELECT * FROM public.taxi_trip_data LIMIT 1"
+
+
+def test_arepair_sql_batch_reports_guard_failure() -> None:
+    import asyncio
+
+    service = SQLService(
+        sql_llm=FakeSQLLLM(sql="SELECT * FROM public.other_table LIMIT 1"),
+        db=FakeDB(),  # type: ignore[arg-type]
+        logger=logging.getLogger("test.sql"),
+    )
+
+    result = asyncio.run(
+        service.arepair_sql_batch(
+            question="q",
+            failed_sql="SELECT * FROM public.bad_table",
+            sql_error="relation does not exist",
+            schema_context="Table: public.taxi_trip_data",
+            allowed_tables=["public.taxi_trip_data", "taxi_trip_data"],
+            attempts=1,
+            n_candidates=2,
+        )
+    )
+    assert result["sql_error_type"] == "allowlist"
+    assert result["sql_query"] == ""